@@ -0,0 +1,138 @@
+"""
+asyncio front end of the engines - hashing never runs on the event loop.
+
+    digest = await hash_async(data, 'md5')
+    async for digest in hash_stream_async(messages, 'sha1', executor=pool):
+        ...
+
+Small messages requested during the same loop iteration are coalesced into one batch_hash call.
+Large ones are hashed in CHUNK pieces on the executor (the loop's default thread pool unless given),
+a cancelled request stops at the next piece. hashlib releases the GIL, so standard parameters keep the
+loop responsive on threads; custom variants run in pure Python and hold the GIL, pass a
+ProcessPoolExecutor for them.
+"""
+import asyncio
+import collections
+import functools
+import importlib
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+from filehash import new_hasher
+from padding import as_bytes_view
+
+SMALL_JOB = 16 * 1024  # messages up to this size are coalesced into batch calls
+MAX_BATCH = 10_000     # at most this many messages per batch call
+CHUNK = 1 << 20        # bytes hashed per executor call for large messages
+MAX_PENDING = 1024     # messages hash_stream_async works on at once
+
+# event loop -> {(algorithm, params, executor): [(message, future), ...]} waiting for the next flush
+_pending = weakref.WeakKeyDictionary()
+
+
+def _params(variant) -> dict:
+    """Constructor parameters from a Spec, a dict or None, lists turned into tuples so they can be keys."""
+    if variant is None:
+        return {}
+    items = variant._asdict().items() if hasattr(variant, '_asdict') else variant.items()
+    return {name: tuple(value) if isinstance(value, list) else value for name, value in items}
+
+
+def _hash_one(algorithm: str, params: dict, message) -> str:
+    hasher = new_hasher(algorithm, params)
+    hasher.update(message)
+    return hasher.hexdigest()
+
+
+def _hash_batch(algorithm: str, params: dict, messages) -> list:
+    try:
+        return importlib.import_module(algorithm).batch_hash(messages, as_hex=True, **params)
+    except ImportError:  # batch engines need NumPy
+        return [_hash_one(algorithm, params, message) for message in messages]
+
+
+def _deliver(batch, job: asyncio.Future) -> None:
+    for _, future in batch:
+        if future.done():  # cancelled by its caller
+            continue
+        if job.cancelled():
+            future.cancel()
+        elif job.exception() is not None:
+            future.set_exception(job.exception())
+    if not job.cancelled() and job.exception() is None:
+        for (_, future), digest in zip(batch, job.result()):
+            if not future.done():
+                future.set_result(digest)
+
+
+def _flush(loop: asyncio.AbstractEventLoop, key) -> None:
+    algorithm, params, executor = key
+    batch = [(message, future) for message, future in _pending[loop].pop(key) if not future.cancelled()]
+    for start in range(0, len(batch), MAX_BATCH):
+        part = batch[start:start + MAX_BATCH]
+        job = loop.run_in_executor(executor, _hash_batch, algorithm, dict(params), [message for message, _ in part])
+        job.add_done_callback(functools.partial(_deliver, part))
+
+
+async def _hash_chunked(loop, executor, algorithm: str, params: dict, message) -> str:
+    hasher = new_hasher(algorithm, params)
+    with as_bytes_view(message) as view:
+        for start in range(0, len(view), CHUNK):
+            # A cancelled caller stops here, the piece already running finishes in the background
+            await loop.run_in_executor(executor, hasher.update, view[start:start + CHUNK])
+    return hasher.hexdigest()
+
+
+async def hash_async(data, algorithm: str = 'md5', variant=None, executor=None) -> str:
+    """
+    Hash one message without blocking the event loop.
+    Don't modify data until the result is available.
+    :param data: Bytes-like message (str is encoded as UTF-8).
+    :param algorithm: md4, md5, sha1 or ripemd160.
+    :param variant: Spec of the algorithm or a dict of its constructor parameters (standard parameters when None).
+    :param executor: concurrent.futures executor doing the work (the loop's default thread pool when None).
+    :return: Hexadecimal digest.
+    """
+    data = as_bytes_view(data)  # str encoded, sizes counted in bytes whatever the item size
+    params = _params(variant)
+    loop = asyncio.get_running_loop()
+    if isinstance(executor, ProcessPoolExecutor):
+        # Views can't be pickled and hashers can't be shared with other processes,
+        # the message goes there in one piece
+        data = bytes(data)
+
+    if len(data) > SMALL_JOB:
+        if isinstance(executor, ProcessPoolExecutor):
+            return await loop.run_in_executor(executor, _hash_one, algorithm, params, data)
+        return await _hash_chunked(loop, executor, algorithm, params, data)
+
+    key = (algorithm, tuple(sorted(params.items())), executor)
+    queues = _pending.setdefault(loop, {})
+    if key not in queues:
+        queues[key] = []
+        loop.call_soon(_flush, loop, key)
+    future = loop.create_future()
+    queues[key].append((data, future))
+    return await future
+
+
+async def hash_stream_async(messages, algorithm: str = 'md5', variant=None, executor=None,
+                            max_pending: int = MAX_PENDING):
+    """
+    Hash every message of an async iterable, digests come out in the order of the messages.
+    Up to max_pending messages are hashed at once, so small messages end up in shared batch calls.
+    Closing the generator cancels the messages still in progress.
+    :param messages: Async iterable of bytes-like messages.
+    :return: Async generator of hexadecimal digests.
+    """
+    pending = collections.deque()
+    try:
+        async for message in messages:
+            pending.append(asyncio.ensure_future(hash_async(message, algorithm, variant, executor)))
+            if len(pending) >= max_pending:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
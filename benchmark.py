@@ -0,0 +1,246 @@
+"""
+Benchmarks of the MD4, MD5, SHA1 and RIPEMD160 engines.
+
+    python benchmark.py run [--quick] [--output results.json]
+    python benchmark.py compare baseline.json results.json [--threshold 0.1]
+
+Modes:
+    step      run_iter until the message is done (the GUI path)
+    fast      run_all, whole blocks through the generated compressor
+    streaming update() with 64 KB chunks, then digest()
+    batch     batch_hash over many short messages (needs NumPy)
+    hashlib   the same work done by hashlib, when it provides the algorithm
+
+fast and batch run with native=False, so standard parameters measure the Python engines
+instead of being handed over to hashlib.
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import md4
+import md5
+import ripemd160
+import sha1
+
+ENGINES = {'md4': md4, 'md5': md5, 'sha1': sha1, 'ripemd160': ripemd160}
+MODES = ('step', 'fast', 'streaming', 'batch', 'hashlib')
+
+SIZES = [1, 64, 1024, 64 * 1024, 1 << 20, 16 << 20, 64 << 20]
+BATCH_SIZES = [1, 10, 100, 1000, 10_000, 100_000, 1_000_000]
+QUICK_SIZES = [1, 64, 1024, 64 * 1024, 1 << 20]
+QUICK_BATCH_SIZES = [1, 100, 10_000]
+
+STEP_LIMIT = 64 * 1024  # step mode runs about 30 000 times slower than fast mode
+BATCH_MESSAGE = 32      # length of every message in batch mode (one padded block)
+CHUNK = 64 * 1024       # update() chunk size in streaming mode
+
+
+def _message(size: int) -> bytes:
+    return (bytes(range(256)) * (size // 256 + 1))[:size]
+
+
+def _hashlib_name(algorithm: str):
+    """Name hashlib knows the algorithm under, or None when this OpenSSL build doesn't provide it."""
+    try:
+        hashlib.new(algorithm)
+    except ValueError:
+        return None
+    return algorithm
+
+
+def _workload(algorithm: str, mode: str, size: int, batch: int):
+    """Build the function measured by a benchmark case, or None when the case doesn't apply."""
+    module = ENGINES[algorithm]
+    engine = getattr(module, algorithm.upper())
+
+    if mode == 'batch':
+        messages = [_message(BATCH_MESSAGE)] * batch
+        return lambda: module.batch_hash(messages, native=False)
+    if mode == 'hashlib' and batch > 1:
+        name = _hashlib_name(algorithm)
+        if name is None:
+            return None
+        messages = [_message(BATCH_MESSAGE)] * batch
+        return lambda: [hashlib.new(name, message).digest() for message in messages]
+
+    message = _message(size)
+    if mode == 'step':
+        def run():
+            hasher = engine(message)
+            while not hasher.run_iter():
+                pass
+        return run
+    if mode == 'fast':
+        return lambda: engine(message, native=False).run_all()
+    if mode == 'streaming':
+        def run():
+            hasher = engine()
+            for i in range(0, size, CHUNK):
+                hasher.update(message[i:i + CHUNK])
+            return hasher.digest()
+        return run
+    if mode == 'hashlib':
+        name = _hashlib_name(algorithm)
+        if name is None:
+            return None
+        return lambda: hashlib.new(name, message).digest()
+    raise ValueError(f"Unknown mode {mode!r}.")
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def measure(run, min_time: float = 0.2, min_repeats: int = 3, max_repeats: int = 50) -> dict:
+    """
+    Time a workload until it ran for min_time seconds (within the repeat limits), then measure
+    its peak memory in one more run under tracemalloc.
+    :return: Repeats, median and latency percentiles in seconds and the peak of traced memory in bytes.
+    """
+    latencies = []
+    total = 0.0
+    while len(latencies) < max_repeats and (len(latencies) < min_repeats or total < min_time):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        total += elapsed
+
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {'repeats': len(latencies),
+            'median_s': _percentile(latencies, 0.5),
+            'p50_ms': _percentile(latencies, 0.5) * 1e3,
+            'p90_ms': _percentile(latencies, 0.9) * 1e3,
+            'p99_ms': _percentile(latencies, 0.99) * 1e3,
+            'peak_bytes': peak}
+
+
+def cases(algorithms, modes, sizes, batch_sizes, step_limit: int = STEP_LIMIT):
+    """Yield (algorithm, mode, size, batch) for every benchmark case."""
+    for algorithm in algorithms:
+        for mode in modes:
+            if mode in ('batch', 'hashlib'):
+                for batch in batch_sizes:
+                    yield algorithm, mode, BATCH_MESSAGE, batch
+            if mode == 'batch':
+                continue
+            for size in sizes:
+                if mode == 'step' and size > step_limit:
+                    continue
+                yield algorithm, mode, size, 1
+
+
+def run_benchmarks(algorithms, modes, sizes, batch_sizes, step_limit: int = STEP_LIMIT,
+                   min_time: float = 0.2, log=print) -> dict:
+    """
+    Run all benchmark cases.
+    :return: JSON-ready dict with the environment ('meta') and one entry per case ('results').
+    """
+    results = []
+    for algorithm, mode, size, batch in cases(algorithms, modes, sizes, batch_sizes, step_limit):
+        run = _workload(algorithm, mode, size, batch)
+        if run is None:
+            continue
+        result = {'algorithm': algorithm, 'mode': mode, 'size': size, 'batch': batch}
+        result.update(measure(run, min_time))
+        result['mb_s'] = size * batch / result['median_s'] / 1e6
+        result['hashes_s'] = batch / result['median_s']
+        results.append(result)
+        log(f"{algorithm:10} {mode:10} {size:>10} B x {batch:<8} {result['mb_s']:10.3f} MB/s "
+            f"{result['hashes_s']:14.1f} hashes/s  p50 {result['p50_ms']:.3f} ms  peak {result['peak_bytes']} B")
+
+    # Slowdown against hashlib for the same algorithm, size and batch
+    reference = {(r['algorithm'], r['size'], r['batch']): r['median_s'] for r in results if r['mode'] == 'hashlib'}
+    for result in results:
+        key = (result['algorithm'], result['size'], result['batch'])
+        if result['mode'] != 'hashlib' and key in reference:
+            result['vs_hashlib'] = result['median_s'] / reference[key]
+
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    meta = {'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'numpy': numpy_version,
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')}
+    return {'meta': meta, 'results': results}
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> list:
+    """
+    Find cases that got slower than the baseline.
+    :param threshold: Allowed relative slowdown of the median time (0.1 == 10 %).
+    :return: (case, baseline median, current median) for every regression.
+    """
+    def key(result):
+        return result['algorithm'], result['mode'], result['size'], result['batch']
+
+    old = {key(result): result['median_s'] for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = old.get(key(result))
+        if before is not None and result['median_s'] > before * (1 + threshold):
+            regressions.append((key(result), before, result['median_s']))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the hashing engines.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="run the benchmarks and save the results as JSON")
+    run.add_argument('--output', '-o', default='benchmark.json')
+    run.add_argument('--algorithms', nargs='+', choices=list(ENGINES), default=list(ENGINES))
+    run.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    run.add_argument('--sizes', nargs='+', type=int, help="message sizes in bytes")
+    run.add_argument('--batch-sizes', nargs='+', type=int, help="number of messages in batch mode")
+    run.add_argument('--step-limit', type=int, default=STEP_LIMIT, help="largest message run in step mode")
+    run.add_argument('--min-time', type=float, default=0.2, help="seconds spent on every case")
+    run.add_argument('--quick', action='store_true', help="sizes up to 1 MB and batches up to 10 000")
+
+    cmp = commands.add_parser('compare', help="flag regressions against a stored baseline")
+    cmp.add_argument('baseline')
+    cmp.add_argument('current')
+    cmp.add_argument('--threshold', type=float, default=0.1, help="allowed slowdown (0.1 == 10 %%)")
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+        batch_sizes = args.batch_sizes or (QUICK_BATCH_SIZES if args.quick else BATCH_SIZES)
+        report = run_benchmarks(args.algorithms, args.modes, sizes, batch_sizes, args.step_limit, args.min_time)
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Saved {len(report['results'])} results to {args.output}")
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    regressions = compare(baseline, current, args.threshold)
+    for (algorithm, mode, size, batch), before, after in regressions:
+        print(f"REGRESSION {algorithm} {mode} {size} B x {batch}: "
+              f"{before * 1e3:.3f} ms -> {after * 1e3:.3f} ms ({after / before - 1:+.1%})")
+    if not regressions:
+        print("No regressions.")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,34 @@
+import hashlib
+import struct
+
+# Layout version of the to_bytes() checkpoints, bumped whenever an engine changes its state format
+CHECKPOINT_VERSION = 2
+
+
+def spec_fingerprint(spec) -> bytes:
+    """
+    Short reference to a variant spec stored in checkpoints instead of the whole spec.
+    The repr contains the spec class name, so checkpoints of different algorithms never match.
+    :param spec: MD4Spec, MD5Spec, SHA1Spec or RIPEMD160Spec.
+    :return: 8 bytes.
+    """
+    return hashlib.sha1(repr(spec).encode('utf-8')).digest()[:8]
+
+
+def unpack_checkpoint(layout: struct.Struct, data: bytes, spec) -> list:
+    """
+    Unpack a checkpoint and make sure it can be restored with the given spec.
+    :param layout: Checkpoint layout of the engine (starting with the version and the fingerprint).
+    :param data: Checkpoint bytes.
+    :param spec: Variant spec of the hasher being restored.
+    :return: Remaining state fields.
+    :raises ValueError: When the size, the layout version or the variant spec don't match.
+    """
+    if len(data) != layout.size:
+        raise ValueError(f"Checkpoint should be {layout.size} bytes long, got {len(data)}.")
+    version, fingerprint, *values = layout.unpack(data)
+    if version != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {version}.")
+    if fingerprint != spec_fingerprint(spec):
+        raise ValueError("Checkpoint was made with a different variant spec.")
+    return values
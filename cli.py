@@ -0,0 +1,193 @@
+"""
+Command line hashing without the GUI.
+
+    python -m cli md5 file1 file2          # sha1sum style "<digest>  <name>" lines, - or nothing reads stdin
+    python -m cli sha1 --raw < file        # binary digest on stdout
+    python -m cli md4 --batch lines.txt    # one digest per line of the file (batch engines, needs NumPy)
+    python -m cli md5 --tree DIR > MANIFEST              # every file under DIR, on all cores
+    python -m cli md5 --tree DIR --verify MANIFEST       # check the files listed in MANIFEST
+
+Variant parameters are the constructor parameters of the engine, given as flags
+(--h1 67452301 --order-list0 0,1,2,...,15 --add-const cos) or as a JSON object with --spec.
+"""
+import argparse
+import importlib
+import json
+import sys
+
+import filehash
+
+ALGORITHMS = ('md4', 'md5', 'sha1', 'ripemd160')
+BATCH_CHUNK = 100_000  # lines hashed per batch_hash call
+
+
+def _spec_class(algorithm: str):
+    return getattr(importlib.import_module(algorithm), algorithm.upper() + 'Spec')
+
+
+def _int_list(text: str) -> tuple[int, ...]:
+    return tuple(int(value) for value in text.replace(',', ' ').split())
+
+
+def _spec_value(name: str, value, default):
+    """Convert a JSON spec value like the matching flag: lists of integers for the tables, strings otherwise."""
+    if isinstance(default, tuple):
+        text = value
+        if isinstance(value, list) and not any(isinstance(item, (bool, list, dict)) for item in value):
+            text = ' '.join(map(str, value))
+        if isinstance(text, str):
+            try:
+                return _int_list(text)
+            except ValueError:
+                pass
+        raise ValueError(f"{name} should be a list of integers, got {value!r}.")
+    if not isinstance(value, str):
+        raise ValueError(f"{name} should be a string, got {value!r}.")
+    return value
+
+
+def variant_params(algorithm: str, args) -> dict:
+    """
+    Collect the variant parameters: the JSON spec first, flags override it.
+    :return: Keyword arguments for the engine constructor.
+    """
+    defaults = _spec_class(algorithm)._field_defaults
+    params = {}
+    if args.spec:
+        with open(args.spec) as file:
+            spec = json.load(file)
+        if not isinstance(spec, dict):
+            raise ValueError(f"{args.spec} should hold a JSON object.")
+        unknown = set(spec) - set(defaults)
+        if unknown:
+            raise ValueError(f"Unknown {algorithm} parameters in {args.spec}: {', '.join(sorted(unknown))}.")
+        params.update({name: _spec_value(name, value, defaults[name]) for name, value in spec.items()})
+    for name in defaults:
+        value = getattr(args, name, None)
+        if value is not None:
+            params[name] = value
+    return params
+
+
+def _hash_files(algorithm: str, params: dict, args) -> int:
+    status = 0
+    for name in args.files or ['-']:
+        try:
+            # A reader thread fills the buffers while this one hashes (filehash.hash_stream)
+            if name == '-':
+                digest = filehash.hash_stream(sys.stdin.buffer, algorithm, params, args.buffer_size, args.buffers)
+            else:
+                digest = filehash.hash_file_threaded(name, algorithm, params, args.buffer_size, args.buffers)
+        except OSError as error:
+            print(f"{algorithm}: {name}: {error.strerror}", file=sys.stderr)
+            status = 1
+            continue
+        if args.raw:
+            sys.stdout.buffer.write(bytes.fromhex(digest))
+        else:
+            print(f"{digest}  {name}")
+    sys.stdout.flush()
+    return status
+
+
+def _read_lines(stream):
+    for line in stream:
+        yield line[:-1] if line.endswith(b'\n') else line
+
+
+def _hash_batch(algorithm: str, params: dict, args) -> int:
+    batch_hash = importlib.import_module(algorithm).batch_hash
+    status = 0
+    for name in args.files or ['-']:
+        try:
+            stream = sys.stdin.buffer if name == '-' else open(name, 'rb')
+        except OSError as error:
+            print(f"{algorithm}: {name}: {error.strerror}", file=sys.stderr)
+            status = 1
+            continue
+        with stream:
+            lines = []
+            for line in _read_lines(stream):
+                lines.append(line)
+                if len(lines) == BATCH_CHUNK:
+                    _write_batch(batch_hash(lines, as_hex=not args.raw, **params), args.raw)
+                    lines = []
+            if lines:
+                _write_batch(batch_hash(lines, as_hex=not args.raw, **params), args.raw)
+    sys.stdout.flush()
+    return status
+
+
+def _write_batch(digests, raw: bool) -> None:
+    if raw:
+        sys.stdout.buffer.write(bytes(digests))
+    else:
+        sys.stdout.write(''.join(digest + '\n' for digest in digests))
+
+
+def _hash_tree(algorithm: str, params: dict, args) -> int:
+    import tree
+
+    if args.verify:
+        with open(args.verify) as file:
+            manifest = tree.read_manifest(file)
+        mismatches = tree.verify_tree(args.tree, manifest, algorithm, args.workers, args.stop_early, **params)
+        for path, expected, actual in mismatches:
+            print(f"{path}: {'FAILED' if actual is not None else 'FAILED open or read'}")
+        if not mismatches:
+            print(f"{len(manifest)} files OK")
+        return 1 if mismatches else 0
+
+    manifest = tree.hash_tree(args.tree, algorithm, args.workers, **params)
+    tree.write_manifest(manifest, sys.stdout)
+    for path, digest in manifest:
+        if digest is None:
+            print(f"{algorithm}: {path}: could not be read", file=sys.stderr)
+    return 1 if any(digest is None for _, digest in manifest) else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m cli', description="Hash files, stdin or batches of lines.")
+    algorithms = parser.add_subparsers(dest='algorithm', required=True, metavar='ALGORITHM')
+    for algorithm in ALGORITHMS:
+        sub = algorithms.add_parser(algorithm, help=f"{algorithm} with standard or custom parameters")
+        sub.add_argument('files', nargs='*', metavar='FILE', help="files to hash, - for stdin (default)")
+        sub.add_argument('--batch', action='store_true',
+                         help="hash every line of the input as a separate message (batch engine, needs NumPy)")
+        sub.add_argument('--raw', action='store_true', help="write binary digests instead of hex lines")
+        sub.add_argument('--spec', metavar='JSON', help="JSON file with variant parameters")
+        sub.add_argument('--buffer-size', type=int, default=filehash.BUFFER_SIZE, metavar='BYTES',
+                         help="size of every read buffer (default %(default)s)")
+        sub.add_argument('--buffers', type=int, default=filehash.BUFFERS, metavar='N',
+                         help="number of read buffers, reading runs at most this far ahead (default %(default)s)")
+        sub.add_argument('--tree', metavar='DIR', help="hash every file under DIR and print a manifest")
+        sub.add_argument('--verify', metavar='MANIFEST', help="with --tree: check the files listed in MANIFEST")
+        sub.add_argument('--stop-early', action='store_true', help="with --verify: stop at the first mismatch")
+        sub.add_argument('--workers', type=int, help="worker processes for --tree (all cores by default)")
+        variant = sub.add_argument_group('variant parameters')
+        for name, default in _spec_class(algorithm)._field_defaults.items():
+            if isinstance(default, tuple):
+                variant.add_argument('--' + name.replace('_', '-'), dest=name, type=_int_list, metavar='N,N,...',
+                                     help=f"default {','.join(map(str, default))}")
+            else:
+                variant.add_argument('--' + name.replace('_', '-'), dest=name, metavar='VALUE',
+                                     help=f"default {default}")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        params = variant_params(args.algorithm, args)
+        if args.tree:
+            return _hash_tree(args.algorithm, params, args)
+        if args.batch:
+            return _hash_batch(args.algorithm, params, args)
+        return _hash_files(args.algorithm, params, args)
+    except (OSError, ValueError) as error:
+        print(f"{args.algorithm}: {error}", file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,366 @@
+"""
+Engine-independent parts of the hashers: the hashlib-style streaming API, copies, observers,
+moving through the message (seek, run_steps, run_round, run_block), runs delegated to hashlib and checkpoints.
+
+An engine mixes HashEngine in and sets byteorder, state_size (number of 32-bit chain values) and the names
+of its chain values, working registers and counters (block counter first). It provides compress_block, run_iter,
+number_of_blocks, _step_index and _rewind.
+"""
+import hashlib
+import operator
+import struct
+from time import perf_counter_ns
+
+import instrumentation
+from checkpoint import CHECKPOINT_VERSION, spec_fingerprint, unpack_checkpoint
+from observers import Observers
+from padding import as_bytes_view, padding
+
+
+def check_table(name: str, values, length: int, low: int, high: int) -> tuple[int, ...]:
+    """
+    Validate an order or shift list of a variant spec before it is inlined into generated code.
+    :param name: Parameter name used in the error message.
+    :param values: Sequence of integers.
+    :param length: Number of values expected.
+    :param low: Smallest allowed value.
+    :param high: Largest allowed value.
+    :return: The values as a tuple of plain ints.
+    :raises ValueError: When the length, a type or a value is wrong.
+    """
+    try:
+        table = tuple(operator.index(value) for value in values)
+    except TypeError:
+        table = None
+    if table is None or len(table) != length or not all(low <= value <= high for value in table):
+        raise ValueError(f"{name} should be {length} integers from {low} to {high}, got {values!r}.")
+    return table
+
+
+class HashEngine:
+    byteorder = 'little'  # of the message words, the length field and the digest
+    state_size = 4        # chain values carried from block to block
+    _chain_attrs = ()     # attribute names of the chain values
+    _registers = ()       # attribute names of the working registers
+    _counters = ()        # attribute names of the position counters, the block counter first
+
+    def get_chain(self) -> tuple[int, ...]:
+        """Get the current chain values as integers."""
+        return tuple(getattr(self, name) for name in self._chain_attrs)
+
+    def _set_chain(self, state) -> None:
+        for name, value in zip(self._chain_attrs, state):
+            setattr(self, name, value)
+
+    def _set_registers(self, values) -> None:
+        for name, value in zip(self._registers, values):
+            setattr(self, name, value)
+
+    def _padded(self):
+        """The pre-processed message (PaddedMessage)."""
+        return self.message
+
+    def _skip_blocks(self, block: int) -> None:
+        """Process whole blocks with compress_block from a block boundary up to the start of the given block."""
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
+        current = getattr(self, self._counters[0])
+        blocks = self._padded()
+        state = self.get_chain()
+        for i in range(current, block):
+            state = self.compress_block(state, blocks[i])
+        if timing:
+            instrumentation.record(self.name, 'compress', perf_counter_ns() - start, blocks=block - current)
+        self._set_chain(state)
+        # Every line of registers starts the block from the chain values
+        self._set_registers(state * (len(self._registers) // self.state_size))
+        setattr(self, self._counters[0], block)
+
+    def _finish(self) -> None:
+        """
+        Run the rest of the message: the block started in step mode step by step, the other blocks
+        with compress_block. The registers are left as step mode leaves them after the last step -
+        the chain values after the last block minus the ones before it (the feed-forward of MD4, MD5 and SHA1).
+        """
+        steps_per_block = self.steps_per_block
+        while not self.finished and self._step_index() % steps_per_block != 0:
+            self.run_iter()
+        if self.finished:
+            return
+
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
+        current = self._step_index() // steps_per_block
+        number_of_blocks = self.number_of_blocks
+        blocks = self._padded()
+        state = self.get_chain()
+        for i in range(current, number_of_blocks):
+            prev = state
+            state = self.compress_block(state, blocks[i])
+        self._set_chain(state)
+        if timing:
+            instrumentation.record(self.name, 'compress', perf_counter_ns() - start, blocks=number_of_blocks - current)
+        self._set_registers((h - p) & 0xFFFFFFFF for h, p in zip(state, prev))
+        setattr(self, self._counters[0], number_of_blocks)
+        self.finished = True
+
+    def _run_native(self) -> None:
+        """
+        Hash the whole message with hashlib (standard parameters only) and finish like run_all would.
+        hashlib doesn't expose the working registers, they are left as None until rebuild_registers computes them.
+        """
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
+        self._native_start = self.get_chain()
+        digest = hashlib.new(self._native, self._padded().data).digest()
+        self._set_chain(struct.unpack(('<' if self.byteorder == 'little' else '>') + f'{self.state_size}I', digest))
+        self._set_registers((None,) * len(self._registers))
+        if timing:
+            instrumentation.record(self.name, 'native', perf_counter_ns() - start, blocks=self.number_of_blocks)
+        setattr(self, self._counters[0], self.number_of_blocks)
+        self.finished = True
+
+    def rebuild_registers(self) -> None:
+        """
+        Compute the working registers a run delegated to hashlib left as None, so they end up as in step mode.
+        This hashes the whole message again with the Python compressor (as slow as run_all with native=False).
+        Does nothing when the registers are known.
+        """
+        if '_native_start' not in self.__dict__:
+            return
+        if self.message is None:
+            raise ValueError("Message hasn't been acknowledged.")
+        state = self.__dict__.pop('_native_start')
+        self._set_chain(state)
+        self._set_registers(state * (len(self._registers) // self.state_size))
+        for name in self._counters:
+            setattr(self, name, 0)
+        self.finished = False
+        self._finish()
+
+    def _require_registers(self) -> None:
+        if '_native_start' in self.__dict__:
+            raise ValueError("Registers of a run delegated to hashlib aren't computed, call rebuild_registers() first.")
+
+    def add_observer(self, hook, level: str = 'step', every: int = 1) -> None:
+        """
+        Attach a callback notified by run_all (see observers.Observers for the arguments it gets).
+        With only block hooks attached run_all still uses compress_block, without hooks nothing is called.
+        :param hook: Callable.
+        :param level: 'step', 'round' or 'block'.
+        :param every: Call the hook only on every Nth step, round or block.
+        """
+        if self._observers is None:
+            self._observers = Observers()
+        self._observers.add(hook, level, every)
+
+    def remove_observer(self, hook) -> None:
+        """Detach a callback attached with add_observer."""
+        if self._observers is not None:
+            self._observers.remove(hook)
+            if not self._observers:
+                self._observers = None
+
+    def seek(self, block: int, step: int = 0) -> bool:
+        """
+        Move to the given position, so the next run_iter runs that step.
+        Whole blocks in between go through compress_block, only the target block is run step by step.
+        Positions before the current one are reached by rewinding to the start of the target block
+        (or of the message when that chain is not known) and running forward from there.
+        :param block: Block index (number of blocks together with step 0 means the end of the message).
+        :param step: Step inside the block (0 to steps_per_block - 1).
+        :return: True when the whole message has been processed.
+        """
+        if self.message is None:
+            raise ValueError("Message hasn't been acknowledged.")
+        number_of_blocks = self.number_of_blocks
+        if not (0 <= step < self.steps_per_block and 0 <= block < number_of_blocks or (block, step) == (number_of_blocks, 0)):
+            raise ValueError(f"Position ({block}, {step}) is outside of the message.")
+
+        target = block * self.steps_per_block + step
+        if target < self._step_index():
+            self._rewind(block)
+
+        # The last block is always run step by step, so the registers end up as in step mode
+        block = min(block, number_of_blocks - 1)
+        if self._step_index() // self.steps_per_block < block:
+            # Finish the block that was started in step mode, then skip whole blocks
+            while self._step_index() % self.steps_per_block != 0:
+                self.run_iter()
+            self._skip_blocks(block)
+        while self._step_index() < target:
+            self.run_iter()
+        return self.finished
+
+    def run_steps(self, n: int) -> bool:
+        """
+        Run the next n steps (fewer when the message ends first).
+        :return: True when the whole message has been processed.
+        """
+        total = self.number_of_blocks * self.steps_per_block
+        return self.seek(*divmod(min(self._step_index() + n, total), self.steps_per_block))
+
+    def run_round(self) -> bool:
+        """
+        Run the steps left in the current round (steps_per_round steps).
+        :return: True when the whole message has been processed.
+        """
+        if self.finished:
+            return True
+        return self.run_steps(self.steps_per_round - self._step_index() % self.steps_per_round)
+
+    def run_block(self) -> bool:
+        """
+        Run the steps left in the current block.
+        :return: True when the whole message has been processed.
+        """
+        if self.finished:
+            return True
+        return self.run_steps(self.steps_per_block - self._step_index() % self.steps_per_block)
+
+    def update(self, data) -> None:
+        """
+        Feed the next part of the message (hashlib style).
+        Full blocks are compressed right away, only the unfinished tail block is kept.
+        The message given to the constructor is treated as the first part.
+        :param data: str (encoded as UTF-8) or any bytes-like object.
+        """
+        if self._seed is not None:
+            seed, self._seed = self._seed, None
+            self.update(seed)
+        data = as_bytes_view(data)
+        self._length += len(data)
+        timing = instrumentation.enabled
+        if timing:
+            started = perf_counter_ns()
+
+        h = self._stream_h
+        start = 0
+        if self._tail:
+            start = 64 - len(self._tail)
+            self._tail += data[:start]
+            if len(self._tail) < 64:
+                if timing:
+                    instrumentation.record(self.name, 'update', perf_counter_ns() - started, bytes=len(data))
+                return
+            h = self.compress_block(h, self._tail)
+        end = start + (len(data) - start) // 64 * 64
+        for i in range(start, end, 64):
+            h = self.compress_block(h, data[i:i + 64])
+        self._stream_h = h
+        self._tail = bytes(data[end:])
+        if timing:
+            instrumentation.record(self.name, 'update', perf_counter_ns() - started, bytes=len(data),
+                                   blocks=(end - start) // 64 + (start > 0))
+
+    def digest(self) -> bytes:
+        """
+        Return the digest of everything passed to update so far.
+        Padding is applied to a copy of the state, so more data can still be added afterwards.
+        """
+        if self._seed is not None:
+            self.update(b'')
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
+        tail = self._tail + padding(self._length, self.byteorder)
+        h = self._stream_h
+        for i in range(0, len(tail), 64):
+            h = self.compress_block(h, tail[i:i + 64])
+        digest = b''.join(x.to_bytes(4, self.byteorder) for x in h)
+        if timing:
+            instrumentation.record(self.name, 'digest', perf_counter_ns() - start, blocks=len(tail) // 64,
+                                   padding_bytes=len(tail) - len(self._tail))
+        return digest
+
+    def hexdigest(self) -> str:
+        """Return the digest of everything passed to update so far as a hexadecimal string."""
+        return self.digest().hex()
+
+    def copy(self):
+        """
+        Return an independent copy of the hasher, including the custom constants, orders and shifts.
+        Tables and buffers are immutable, so sharing them (a shallow copy) is enough.
+        """
+        other = object.__new__(type(self))
+        other.__dict__.update(self.__dict__)
+        if self._observers is not None:
+            other._observers = Observers(self._observers)
+        return other
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the hashing state into a compact checkpoint (the size of the engine's _CHECKPOINT layout).
+        Covers the streaming state (chain values, pending tail bytes, total length), the step-mode
+        chain values, registers and counters, and a fingerprint of the variant spec.
+        After a run delegated to hashlib the registers are not computed, the checkpoint marks them as pending
+        (finished flag 2) and rebuild_registers of the restored hasher computes them from its message.
+        A message given to the constructor and not hashed by update/digest yet is only marked as pending
+        (together with its length), nothing is hashed to make the checkpoint.
+        The message itself is not stored - pass it again to from_bytes to continue in step mode or to hash it.
+        """
+        seeded = self._seed is not None
+        length = len(as_bytes_view(self._seed)) if seeded else self._length
+        return self._CHECKPOINT.pack(CHECKPOINT_VERSION, spec_fingerprint(self.spec),
+                                     *self._stream_h, length, len(self._tail), self._tail, seeded,
+                                     *self._checkpoint_state())
+
+    def _checkpoint_state(self) -> tuple:
+        """Step-mode part of a checkpoint: chain values, registers, counters and the finished flag."""
+        if '_native_start' in self.__dict__:
+            registers, finished = (0,) * len(self._registers), 2
+        else:
+            registers, finished = (getattr(self, name) for name in self._registers), self.finished
+        return (*self.get_chain(), *registers, *(getattr(self, name) for name in self._counters), finished)
+
+    def _restore(self, data: bytes, message=None) -> None:
+        values = unpack_checkpoint(self._CHECKPOINT, data, self.spec)
+        n = self.state_size
+        start = self.get_chain()  # restored hashers are fresh, so these are the initial chain values
+        self._stream_h = tuple(values[:n])
+        self._length = values[n]
+        self._tail = values[n + 2][:values[n + 1]]
+        self._seed = None
+        if values[n + 3]:
+            # The constructor message wasn't hashed yet, the given one takes its place
+            if message is None:
+                raise ValueError("Checkpoint was made before the message given to the constructor was hashed, "
+                                 "pass the message to from_bytes.")
+            if len(as_bytes_view(message)) != self._length:
+                raise ValueError("Message doesn't match the checkpoint.")
+            self._seed, self._length = message, 0
+        if message is not None:
+            self.ack_message(message)
+        values = values[n + 4:]
+        registers = n + len(self._registers)
+        counters = registers + len(self._counters)
+        self._set_chain(values[:n])
+        self._set_registers(values[n:registers])
+        for name, value in zip(self._counters, values[registers:counters]):
+            setattr(self, name, value)
+        self.finished = bool(values[counters])
+        self.__dict__.pop('_native_start', None)
+        if values[counters] == 2:
+            # Finished by hashlib, rebuild_registers computes the registers from the message
+            self._native_start = start
+            self._set_registers((None,) * len(self._registers))
+
+    def __copy__(self):
+        return self.copy()
+
+    def __getstate__(self):
+        # Pickles (and deep copies) hold the spec, the checkpoint and the message bytes, not the generated code.
+        # Observers are pickled as they are, so hooks have to be picklable themselves.
+        if self._seed is not None and as_bytes_view(self._seed) != self._padded().data:
+            self.update(b'')  # ack_message replaced the constructor message before it was hashed
+        message = None if self.message is None else bytes(self._padded().data)
+        return self.spec, self.to_bytes(), message, self._native is not None, self._observers
+
+    def __setstate__(self, state):
+        spec, data, message, native, observers = state
+        self.__init__(None, *spec, native=native)
+        self._restore(data, message)
+        self._observers = observers
@@ -0,0 +1,155 @@
+import hashlib
+import importlib
+import mmap
+import os
+import queue
+import threading
+
+from padding import padding
+
+WINDOW = 8 << 20       # bytes of the mapping processed between madvise calls, a multiple of the page size
+BUFFER_SIZE = 1 << 20  # default size of every reader buffer
+BUFFERS = 4            # default number of reader buffers
+
+
+def _advise(mapping: mmap.mmap, advice: str, start: int = 0, length: int = 0) -> None:
+    # madvise and its flags only exist on some platforms, the hints are skipped elsewhere
+    flag = getattr(mmap, advice, None)
+    if flag is not None and hasattr(mapping, 'madvise'):
+        mapping.madvise(flag, start, length)
+
+
+def _spec(module, algorithm: str, variant):
+    spec_class = getattr(module, algorithm.upper() + 'Spec')
+    if variant is None:
+        return spec_class()
+    if isinstance(variant, spec_class):
+        return variant
+    return spec_class(**{name: tuple(value) if isinstance(value, list) else value for name, value in variant.items()})
+
+
+def hash_file(path, algorithm: str = 'md5', variant=None) -> str:
+    """
+    Hash a file through a read-only memory mapping.
+    64-byte blocks are memoryview slices of the mapping passed straight to the compressor, only the final
+    partial block and the padding are copied into a scratch buffer (at most 128 bytes).
+    The mapping is read in windows: MADV_SEQUENTIAL / MADV_WILLNEED ask the kernel to read ahead and every
+    finished window is dropped with MADV_DONTNEED, so resident memory stays flat however large the file is.
+    :param path: File to hash.
+    :param algorithm: md4, md5, sha1 or ripemd160.
+    :param variant: Spec of the algorithm or a dict of its constructor parameters (standard parameters when None).
+    :return: Hexadecimal digest.
+    """
+    module = importlib.import_module(algorithm)
+    compiled = module.compile_spec(_spec(module, algorithm, variant))
+    byteorder = 'big' if algorithm == 'sha1' else 'little'
+    native = hashlib.new(compiled.native) if compiled.native else None
+    compress = compiled.compress
+    h = compiled.h
+
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        tail = b''
+        if size:  # empty files can't be mapped
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping, memoryview(mapping) as view:
+                size = len(mapping)
+                # hashlib takes everything at once, the Python compressors only whole blocks
+                full = size if native is not None else size - size % 64
+                _advise(mapping, 'MADV_SEQUENTIAL')
+                for start in range(0, full, WINDOW):
+                    end = min(start + WINDOW, full)
+                    _advise(mapping, 'MADV_WILLNEED', start, end - start)
+                    if native is not None:
+                        native.update(view[start:end])
+                    else:
+                        for i in range(start, end, 64):
+                            h = compress(h, view[i:i + 64])
+                    _advise(mapping, 'MADV_DONTNEED', start, end - start)
+                tail = bytes(view[full:])
+
+    if native is not None:
+        return native.hexdigest()
+    scratch = tail + padding(size, byteorder)
+    for i in range(0, len(scratch), 64):
+        h = compress(h, scratch[i:i + 64])
+    return b''.join(x.to_bytes(4, byteorder) for x in h).hex()
+
+
+def new_hasher(algorithm: str, variant):
+    """hashlib object for standard parameters when hashlib has the algorithm, the engine otherwise."""
+    module = importlib.import_module(algorithm)
+    spec = _spec(module, algorithm, variant)
+    native = module.compile_spec(spec).native
+    if native is not None:
+        return hashlib.new(native)
+    return getattr(module, algorithm.upper()).from_spec(spec)
+
+
+def _read_ahead(stream, free: queue.Queue, filled: queue.Queue) -> None:
+    """Reader thread: fill free buffers with readinto and pass them on until the stream ends."""
+    try:
+        while True:
+            buffer = free.get()
+            if buffer is None:  # hashing stopped
+                return
+            length = stream.readinto(buffer)
+            if not length:
+                filled.put((None, None))
+                return
+            filled.put((buffer, length))
+    except BaseException as error:
+        filled.put((None, error))
+
+
+def hash_stream(stream, algorithm: str = 'md5', variant=None, buffer_size: int = BUFFER_SIZE,
+                buffers: int = BUFFERS) -> str:
+    """
+    Hash a binary stream while a reader thread keeps reading ahead.
+    The reader fills a pool of reusable bytearrays with readinto, this thread feeds them to update.
+    When all buffers are full the reader waits for one to come back, so at most buffers * buffer_size
+    bytes are held in memory. Wall time gets close to max(read time, hash time) instead of their sum
+    (hashlib and file reads release the GIL).
+    :param stream: Object with readinto (a file opened with 'rb', sys.stdin.buffer, a socket file, ...).
+    :param algorithm: md4, md5, sha1 or ripemd160.
+    :param variant: Spec of the algorithm or a dict of its constructor parameters (standard parameters when None).
+    :param buffer_size: Bytes read at once.
+    :param buffers: Number of buffers (2 is double buffering).
+    :return: Hexadecimal digest.
+    """
+    if buffers < 2:
+        raise ValueError("At least two buffers are needed to overlap reading and hashing.")
+    hasher = new_hasher(algorithm, variant)
+
+    free = queue.Queue()
+    filled = queue.Queue()
+    for _ in range(buffers):
+        free.put(bytearray(buffer_size))
+    reader = threading.Thread(target=_read_ahead, args=(stream, free, filled), daemon=True)
+    reader.start()
+    try:
+        while True:
+            buffer, length = filled.get()
+            if buffer is None:
+                if length is not None:
+                    raise length
+                break
+            with memoryview(buffer) as view:
+                hasher.update(view[:length])
+            free.put(buffer)
+    except BaseException:
+        # Hashing stopped early: a reader waiting for a buffer is woken up, one blocked in readinto
+        # (stdin, a pipe) can't be - it is a daemon thread and isn't waited for
+        free.put(None)
+        raise
+    reader.join()  # the reader returned after passing the end of the stream on
+    return hasher.hexdigest()
+
+
+def hash_file_threaded(path, algorithm: str = 'md5', variant=None, buffer_size: int = BUFFER_SIZE,
+                       buffers: int = BUFFERS) -> str:
+    """
+    Hash a file with hash_stream - for files that are better read than mapped (network volumes, pipes).
+    The file is opened unbuffered, so readinto goes straight into the pool buffers.
+    """
+    with open(path, 'rb', buffering=0) as file:
+        return hash_stream(file, algorithm, variant, buffer_size, buffers)
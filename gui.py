@@ -1382,7 +1382,7 @@ class ContentRIPEMD(MDStackLayout):
         self.y4_ti = MDTextField(text=y4_def, multiline=False, size_hint=(0.2, self.widget_height), on_text_validate=self.check_if_number)
         self.add_widget(self.y4_ti)
 
-        y5_def = '0953fd4e'
+        y5_def = 'a953fd4e'
         self.y5_ti = MDTextField(text=y5_def, multiline=False, size_hint=(0.2, self.widget_height), on_text_validate=self.check_if_number)
         self.add_widget(self.y5_ti)
 
@@ -1804,7 +1804,7 @@ class ContentRIPEMD(MDStackLayout):
         self.y2_ti.text = '5a827999'
         self.y3_ti.text = '6ed9eba1'
         self.y4_ti.text = '8f1bbcdc'
-        self.y5_ti.text = '0953fd4e'
+        self.y5_ti.text = 'a953fd4e'
         self.y1_tir.text = '50a28be6'
         self.y2_tir.text = '5c4dd124'
         self.y3_tir.text = '6d703ef3'
@@ -0,0 +1,58 @@
+import threading
+
+# Checked by the engines before touching the clock or the registry, so with instrumentation off
+# every instrumented spot costs a single attribute lookup
+enabled = False
+
+_lock = threading.Lock()
+_timings = {}   # (algorithm, phase) -> [calls, total_ns]
+_counters = {}  # (algorithm, counter) -> value
+
+
+def enable(on: bool = True) -> None:
+    """Turn instrumentation on (or off) for the whole process."""
+    global enabled
+    enabled = on
+
+
+def disable() -> None:
+    enable(False)
+
+
+def record(algorithm: str, phase: str, elapsed_ns: int, **counts: int) -> None:
+    """
+    Add one timed call of a phase to the registry.
+    :param algorithm: Engine name (md4, md5, sha1, ripemd160).
+    :param phase: preprocess, step, compress, update, digest, format or batch.
+    :param elapsed_ns: perf_counter_ns difference.
+    :param counts: Counters to increase, e.g. blocks=3, bytes=150.
+    """
+    with _lock:
+        timing = _timings.setdefault((algorithm, phase), [0, 0])
+        timing[0] += 1
+        timing[1] += elapsed_ns
+        for name, value in counts.items():
+            _counters[(algorithm, name)] = _counters.get((algorithm, name), 0) + value
+
+
+def snapshot() -> dict:
+    """
+    Copy of everything recorded so far.
+    :return: {algorithm: {'counters': {name: value}, 'timings': {phase: {'calls': n, 'total_ns': ns}}}}
+    """
+    result = {}
+    with _lock:
+        for (algorithm, phase), (calls, total_ns) in _timings.items():
+            entry = result.setdefault(algorithm, {'counters': {}, 'timings': {}})
+            entry['timings'][phase] = {'calls': calls, 'total_ns': total_ns}
+        for (algorithm, name), value in _counters.items():
+            entry = result.setdefault(algorithm, {'counters': {}, 'timings': {}})
+            entry['counters'][name] = value
+    return result
+
+
+def reset() -> None:
+    """Forget everything recorded so far."""
+    with _lock:
+        _timings.clear()
+        _counters.clear()
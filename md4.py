@@ -1,4 +1,14 @@
-import numpy as np
+import functools
+import struct
+from time import perf_counter_ns
+from typing import Callable, NamedTuple
+
+import instrumentation
+from engine import HashEngine, check_table
+from native import native_batch, native_name
+from observers import Observers, print_registers, run_observed
+from padding import PaddedMessage, pack_messages
+from steptrace import StepTrace
 
 def chain_constraints(h1: str = '67452301', h2: str = 'efcdab89') -> tuple[str, str]:
     """
@@ -12,7 +22,95 @@ def chain_constraints(h1: str = '67452301', h2: str = 'efcdab89') -> tuple[str,
     return h3, h4
 
 
-class MD4:
+class MD4Spec(NamedTuple):
+    """
+    Frozen, hashable description of an MD4 variant - the constructor parameters of MD4.
+    Lists are kept as tuples, so a spec can be used as a cache key.
+    """
+    h1: str = '67452301'
+    h2: str = 'efcdab89'
+    add_const0: str = '00000000'
+    add_const1: str = '5a827999'
+    add_const2: str = '6ed9eba1'
+    order_list0: tuple[int, ...] = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15)
+    order_list1: tuple[int, ...] = (0, 4, 8, 12, 1, 5, 9, 13, 2, 6, 10, 14, 3, 7, 11, 15)
+    order_list2: tuple[int, ...] = (0, 8, 4, 12, 2, 10, 6, 14, 1, 9, 5, 13, 3, 11, 7, 15)
+    shift_list0: tuple[int, ...] = (3, 7, 11, 19)
+    shift_list1: tuple[int, ...] = (3, 5, 9, 13)
+    shift_list2: tuple[int, ...] = (3, 9, 11, 15)
+
+
+class CompiledMD4(NamedTuple):
+    """Tables of a compiled MD4Spec together with its generated compression function."""
+    h: tuple[int, int, int, int]
+    add_consts: tuple[int, int, int]
+    order_lists: tuple[tuple[int, ...], tuple[int, ...], tuple[int, ...]]
+    shift_lists: tuple[tuple[int, ...], tuple[int, ...], tuple[int, ...]]
+    compress: Callable
+    native: str | None  # hashlib name when the tables are the standard ones and hashlib has the algorithm
+
+
+def _generate_compress(add_consts, order_lists, shift_lists) -> str:
+    """
+    Generate the source of a fully unrolled compression function.
+    Constants, word indices and rotation amounts are inlined as literals and the registers are
+    renamed at generation time instead of being shuffled at run time.
+    """
+    functions = ('{d} ^ ({b} & ({c} ^ {d}))',       # (b & c) | (~b & d)
+                 '({b} & {c}) | ({d} & ({b} | {c}))',  # (b & c) | (b & d) | (c & d)
+                 '{b} ^ {c} ^ {d}')
+    words = ', '.join(f'X{i}' for i in range(16))
+    lines = ['def compress(state, block):',
+             f"    {words} = unpack('<16I', block)",
+             '    a, b, c, d = state']
+    names = ['a', 'b', 'c', 'd']
+    for cycle in range(3):
+        for i in range(16):
+            a, b, c, d = names
+            F = functions[cycle].format(b=b, c=c, d=d)
+            s = shift_lists[cycle][i]
+            # Only the value being rotated has to be masked, the registers are masked once at the end
+            lines.append(f'    t = ({a} + ({F}) + X{order_lists[cycle][i]} + {add_consts[cycle]:#010x}) & 0xFFFFFFFF')
+            lines.append(f'    {a} = (t << {s}) | (t >> {32 - s})')
+            names = [d, a, b, c]
+    lines.append('    return ((state[0] + {}) & 0xFFFFFFFF, (state[1] + {}) & 0xFFFFFFFF, '
+                 '(state[2] + {}) & 0xFFFFFFFF, (state[3] + {}) & 0xFFFFFFFF)'.format(*names))
+    return '\n'.join(lines) + '\n'
+
+
+@functools.lru_cache(maxsize=256)
+def compile_spec(spec: MD4Spec) -> CompiledMD4:
+    """
+    Parse an MD4Spec into its tables and generate its specialized compression function.
+    Results are kept in a bounded LRU cache, so hashers of an already seen variant are cheap to create.
+    """
+    h3, h4 = chain_constraints(spec.h1, spec.h2)
+    h = (int(spec.h1, 16), int(spec.h2, 16), int(h3, 16), int(h4, 16))
+    add_consts = (int(spec.add_const0, 16), int(spec.add_const1, 16), int(spec.add_const2, 16))
+    order_lists = tuple(check_table(f'order_list{i}', getattr(spec, f'order_list{i}'), 16, 0, 15) for i in range(3))
+    shift_lists = tuple(check_table(f'shift_list{i}', getattr(spec, f'shift_list{i}'), 4, 1, 31) * 4 for i in range(3))
+
+    namespace = {'unpack': struct.unpack}
+    exec(compile(_generate_compress(add_consts, order_lists, shift_lists), '<md4 compress>', 'exec'), namespace)
+
+    # Standard tables (however the spec spelled them) can be handed over to hashlib
+    standard = spec == MD4Spec() or (h, add_consts, order_lists, shift_lists) == compile_spec(MD4Spec())[:4]
+    native = native_name('md4') if standard else None
+    return CompiledMD4(h, add_consts, order_lists, shift_lists, namespace['compress'], native)
+
+
+class MD4(HashEngine):
+    name = 'md4'
+    digest_size = 16
+    block_size = 64
+    steps_per_block = 48
+    steps_per_round = 16
+    byteorder = 'little'
+    state_size = 4
+    _chain_attrs = ('h1', 'h2', 'h3', 'h4')
+    _registers = ('a', 'b', 'c', 'd')
+    _counters = ('block_counter', 'word_counter', 'cycle_counter')
+
     def __init__(self, message: str = None,  h1: str = '67452301', h2: str = 'efcdab89', 
                  add_const0: str = '00000000', add_const1: str = '5a827999', add_const2: str = '6ed9eba1',
                  order_list0: list[int] = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15],
@@ -20,15 +118,16 @@ class MD4:
                  order_list2: list[int] = [0, 8, 4, 12, 2, 10, 6, 14, 1, 9, 5, 13, 3, 11, 7, 15],
                  shift_list0: list[int] = [3, 7, 11, 19],
                  shift_list1: list[int] = [3, 5, 9, 13],
-                 shift_list2: list[int] = [3, 9, 11, 15]):
+                 shift_list2: list[int] = [3, 9, 11, 15], *, native: bool = True):
 
-        # Initialize chain constraints
-        h3, h4 = chain_constraints(h1, h2)
+        # Variant parameters are parsed and compiled once per distinct spec
+        self.spec = MD4Spec(h1, h2, add_const0, add_const1, add_const2,
+                            tuple(order_list0), tuple(order_list1), tuple(order_list2),
+                            tuple(shift_list0), tuple(shift_list1), tuple(shift_list2))
+        compiled = compile_spec(self.spec)
 
-        self.h1 = int(h1, 16)
-        self.h2 = int(h2, 16)
-        self.h3 = int(h3, 16)
-        self.h4 = int(h4, 16)
+        # Initialize chain constraints
+        self.h1, self.h2, self.h3, self.h4 = compiled.h
 
         # Registers
         self.a = self.h1
@@ -37,19 +136,17 @@ class MD4:
         self.d = self.h4
 
         # Initialize addititive constants
-        self.add_const0 = int(add_const0, 16)
-        self.add_const1 = int(add_const1, 16)
-        self.add_const2 = int(add_const2, 16)
+        self.add_const0, self.add_const1, self.add_const2 = compiled.add_consts
 
         # Initialize order lists
-        self.order_list0 = order_list0
-        self.order_list1 = order_list1
-        self.order_list2 = order_list2
+        self.order_list0, self.order_list1, self.order_list2 = compiled.order_lists
 
         # Initialize shift lists
-        self.shift_list0 = shift_list0 * 4
-        self.shift_list1 = shift_list1 * 4
-        self.shift_list2 = shift_list2 * 4
+        self.shift_list0, self.shift_list1, self.shift_list2 = compiled.shift_lists
+
+        self._compress = compiled.compress
+        # hashlib name for run_all and batch_hash, native=False keeps the Python compressor (e.g. to benchmark it)
+        self._native = compiled.native if native else None
 
         # Initialize algorithm parameters and counters
         self.finished = False # flag to check if the algorithm has finished processing
@@ -63,32 +160,41 @@ class MD4:
         self.word_counter: int = 0 # word counter
         self.cycle_counter: int = 0 # cycle counter
 
+        # Streaming state for update/digest: chain values, unfinished tail block and total length
+        self._stream_h = (self.h1, self.h2, self.h3, self.h4)
+        self._tail = b''
+        self._length = 0
+        self._seed = message  # absorbed by the first update/digest call
+        self._observers = None  # see add_observer
+
+        # Chain constraints before blocks finished in step mode (block index -> chain), step_back needs them
+        # to cross block boundaries. The bulk paths don't record anything, missing ones are rebuilt on demand.
+        self._chain_history = {}
+
+    @classmethod
+    def from_spec(cls, spec: MD4Spec, message: str = None):
+        """Create a hasher for the given variant spec."""
+        return cls(message, *spec)
 
     def ack_message(self, message: str):
         self.message, self.number_of_blocks = self.__preprocess(message)
+        self._chain_history = {}
 
-
-    def __preprocess(self, message: str) -> tuple[bytes, int]:
-        """Pre-process the input message for MD4 hashing."""
-        if len(message) == 0:
+    def __preprocess(self, message) -> tuple[PaddedMessage, int]:
+        """
+        Pre-process the input message for MD4 hashing.
+        The input (str or any bytes-like object) is not copied, blocks are views into it.
+        """
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
+        message = PaddedMessage(message, 'little')
+        if timing:
+            instrumentation.record(self.name, 'preprocess', perf_counter_ns() - start, bytes=message.length,
+                                   padding_bytes=message.number_of_blocks * 64 - message.length)
+        if message.length == 0:
             raise ValueError("Message cannot be empty.")
-        original_byte_len = np.clip(len(message), 1, 2**64)
-        original_bit_len = original_byte_len * 8
-
-        # Convert the message to bytes
-        message = message.encode('utf-8')
-
-        # Append the bit '1' to the message
-        message += b'\x80'
-
-        # Append zeros until the length is congruent to 448 modulo 512
-        while (len(message) * 8) % 512 != 448:
-            message += b'\x00'
-
-        # Append the original length as a 64-bit integer
-        message += original_bit_len.to_bytes(8, byteorder='little')
-        
-        return message, len(message) // 64
+        return message, message.number_of_blocks
     
 
     def run_iter(self):
@@ -96,7 +202,14 @@ class MD4:
         Run the MD4 algorithm on the given message.
         :param message: The input message to hash.
         """
-        block = self.message[(self.block_counter * 64):(self.block_counter * 64 + 64)] # Get the current block (64 bytes == 16 words)
+        if self.finished:
+            return True
+
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
+
+        block = self.message[self.block_counter] # Get the current block (64 bytes == 16 words)
 
         if self.cycle_counter == 0: # First round
             x = block[(self.order_list0[self.word_counter] * 4):(self.order_list0[self.word_counter] * 4 + 4)] # Get the current word (4 bytes == 1 word)
@@ -126,6 +239,7 @@ class MD4:
             if self.cycle_counter == 2:
                 self.cycle_counter = 0
                 self.block_counter += 1
+                self._chain_history[self.block_counter - 1] = (self.h1, self.h2, self.h3, self.h4)
                 # Update chain constraints
                 self.h1 = (self.h1 + self.a) & 0xFFFFFFFF
                 self.h2 = (self.h2 + self.b) & 0xFFFFFFFF
@@ -145,34 +259,185 @@ class MD4:
         else:
             self.word_counter += 1
 
+        if timing:
+            instrumentation.record(self.name, 'step', perf_counter_ns() - start, steps=1)
         return self.finished
 
+    def step_back(self) -> bool:
+        """
+        Undo the last run_iter step by inverting it: the rotation is undone and the round function,
+        the message word and the additive constant are subtracted again.
+        Block boundaries use the chain constraints recorded by run_iter; when the block was passed by
+        run_all or seek they are rebuilt with compress_block from the nearest known ones.
+        :return: True when the hasher is back before the first step.
+        """
+        if self.block_counter == 0 and self.word_counter == 0 and self.cycle_counter == 0:
+            return True
+
+        if self.finished or (self.word_counter == 0 and self.cycle_counter == 0):
+            # Crossing back over a block boundary: registers after the last step are the chain difference
+            self.__dict__.pop('_native_start', None)
+            prev = self._chain_before(self.block_counter - 1)
+            (self.a, self.b, self.c, self.d) = ((h - p) & 0xFFFFFFFF for h, p in
+                                                zip((self.h1, self.h2, self.h3, self.h4), prev))
+            (self.h1, self.h2, self.h3, self.h4) = prev
+            self.block_counter -= 1
+            self.cycle_counter = 2
+            self.word_counter = 15
+            self.finished = False
+        elif self.word_counter == 0:
+            self.cycle_counter -= 1
+            self.word_counter = 15
+        else:
+            self.word_counter -= 1
+
+        if self.cycle_counter == 0:
+            order, shift, k = self.order_list0, self.shift_list0, self.add_const0
+        elif self.cycle_counter == 1:
+            order, shift, k = self.order_list1, self.shift_list1, self.add_const1
+        else:
+            order, shift, k = self.order_list2, self.shift_list2, self.add_const2
+
+        # The step moved (a, b, c, d) to (d, rotl(temp), b, c)
+        (b, c, d) = (self.c, self.d, self.a)
+        s = shift[self.word_counter]
+        temp = ((self.b >> s) | (self.b << (32 - s))) & 0xFFFFFFFF  # Rotate right
+        if self.cycle_counter == 0:
+            F = (b & c) | (~b & d)
+        elif self.cycle_counter == 1:
+            F = (b & c) | (b & d) | (c & d)
+        else:
+            F = b ^ c ^ d
+        x = order[self.word_counter] * 4
+        x = int.from_bytes(self.message[self.block_counter][x:x + 4], byteorder='little')
+        self.a = (temp - F - x - k) & 0xFFFFFFFF
+        (self.b, self.c, self.d) = (b, c, d)
+
+        return self.block_counter == 0 and self.word_counter == 0 and self.cycle_counter == 0
+
+    def compress_block(self, state: tuple[int, int, int, int], block: bytes) -> tuple[int, int, int, int]:
+        """
+        Process a whole 64-byte block at once (all 48 steps).
+        Runs the compression function generated for this variant (see compile_spec),
+        with the order lists, shift lists and additive constants inlined as literals.
+        :param state: Chain constraints (h1, h2, h3, h4) before the block.
+        :param block: 64 bytes of the pre-processed message.
+        :return: Chain constraints after the block.
+        """
+        return self._compress(state, block)
 
     def run_all(self, vis: bool = False):
         """
         Run the MD4 algorithm on the given message.
-        :param message: The input message to hash.
+        Without step or round observers the remaining whole blocks go through compress_block.
+        With standard parameters and nothing run in step mode yet the message is handed over to hashlib,
+        the working registers are None then (see rebuild_registers).
+        :param vis: Whether to print the registers after every step.
         :return: The MD4 hash of the message as a hexadecimal string.
         """
-        while not self.finished:
-            if vis:
-                print(self.get_registers(False))
-            self.run_iter()
-
+        if self.message is None:
+            raise ValueError("Message hasn't been acknowledged.")
+
+        observers = self._observers
+        if vis:
+            observers = Observers(observers)
+            observers.add(print_registers)
+        if observers:
+            run_observed(self, observers)
+        elif self._native is not None and self._step_index() == 0:
+            self._run_native()
+        else:
+            self._finish()
 
         # Convert the final hash to hexadecimal format
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
         digest = (self.h1.to_bytes(4, 'little') +
                   self.h2.to_bytes(4, 'little') +
                   self.h3.to_bytes(4, 'little') +
                   self.h4.to_bytes(4, 'little'))
+        if timing:
+            instrumentation.record(self.name, 'format', perf_counter_ns() - start)
         return digest.hex()
     
 
+    def _step_index(self) -> int:
+        """Number of steps done so far over the whole message."""
+        if self.finished:
+            return self.number_of_blocks * self.steps_per_block
+        return self.block_counter * self.steps_per_block + self.cycle_counter * 16 + self.word_counter
+
+    def _rewind(self, block: int) -> None:
+        """Go back to the start of the given block, or to the nearest recorded block boundary before it."""
+        self.__dict__.pop('_native_start', None)  # the registers are set here, nothing to rebuild
+        if block == self.block_counter and not self.finished:
+            state = (self.h1, self.h2, self.h3, self.h4)
+        else:
+            # Start from the nearest recorded block boundary, seek skips forward from there
+            self.block_counter, state = self._nearest_chain(block)
+        self.h1, self.h2, self.h3, self.h4 = state
+        self.a, self.b, self.c, self.d = state
+        self.cycle_counter = 0
+        self.word_counter = 0
+        self.finished = False
+
+    def _nearest_chain(self, block: int) -> tuple[int, tuple[int, int, int, int]]:
+        """Latest recorded block boundary up to the given block (the start of the message when there is none)."""
+        start = max((known for known in self._chain_history if known <= block), default=0)
+        return start, self._chain_history.get(start, compile_spec(self.spec).h)
+
+    def _chain_before(self, block: int) -> tuple[int, int, int, int]:
+        """Chain constraints before the given block, compressed from the nearest recorded ones when missing."""
+        if block not in self._chain_history:
+            start, state = self._nearest_chain(block)
+            for i in range(start, block):
+                state = self.compress_block(state, self.message[i])
+            self._chain_history[block] = state
+        return self._chain_history[block]
+
+    def trace(self) -> StepTrace:
+        """
+        Run the whole message once and record the registers after every step.
+        The hasher itself is not advanced, run_iter/run_all still start where they were.
+        :return: StepTrace with 48 rows of (a, b, c, d) per block and the chain constraints at block boundaries.
+        """
+        if self.message is None:
+            raise ValueError("Message hasn't been acknowledged.")
+
+        trace = StepTrace(self.number_of_blocks, 48, 4, 4)
+        rounds = ((self.add_const0, self.order_list0, self.shift_list0),
+                  (self.add_const1, self.order_list1, self.shift_list1),
+                  (self.add_const2, self.order_list2, self.shift_list2))
+        h = compile_spec(self.spec).h
+        trace.chain[0] = h
+        for block_counter in range(self.number_of_blocks):
+            X = struct.unpack('<16I', self.message[block_counter])
+            a, b, c, d = h
+            rows = []
+            for cycle_counter, (k, order, shifts) in enumerate(rounds):
+                for word_counter in range(16):
+                    if cycle_counter == 0:
+                        F = (b & c) | (~b & d)
+                    elif cycle_counter == 1:
+                        F = (b & c) | (b & d) | (c & d)
+                    else:
+                        F = b ^ c ^ d
+                    temp = (a + F + X[order[word_counter]] + k) & 0xFFFFFFFF
+                    s = shifts[word_counter]
+                    a, b, c, d = d, ((temp << s) | (temp >> (32 - s))) & 0xFFFFFFFF, b, c
+                    rows.append((a, b, c, d))
+            trace.registers[block_counter * 48:(block_counter + 1) * 48] = rows
+            h = tuple((x + y) & 0xFFFFFFFF for x, y in zip(h, (a, b, c, d)))
+            trace.chain[block_counter + 1] = h
+        return trace
+
     def get_registers(self, littleEndian: bool = True) -> str:
         """
         Get the current values of the registers.
         :return: A tuple containing the current values of the registers.
         """
+        self._require_registers()
         if littleEndian:
             endianess = 'little'
         else:
@@ -198,10 +463,106 @@ class MD4:
                   self.h4.to_bytes(4, 'little'))
         return digest.hex()
 
+    def copy(self):
+        other = super().copy()
+        other._chain_history = dict(self._chain_history)
+        return other
+
+    # Checkpoint layout: version, spec fingerprint, streaming chain values, total length, tail length and tail,
+    # whether the constructor message is still to be hashed by update/digest (the length is then its length),
+    # then the step-mode chain values, registers, block counter, word and cycle counters and the finished flag
+    # (2 when a run delegated to hashlib left the registers to be rebuilt)
+    _CHECKPOINT = struct.Struct('<B8s4IQB63sB4I4IQBBB')
+
+    def _restore(self, data: bytes, message=None) -> None:
+        super()._restore(data, message)
+        self._chain_history = {}
+
+    @classmethod
+    def from_bytes(cls, data: bytes, spec: MD4Spec = None, message=None):
+        """
+        Restore a hasher from a to_bytes() checkpoint.
+        :param data: Checkpoint bytes.
+        :param spec: Variant spec the checkpoint was made with (standard MD4 when omitted).
+        :param message: Message to continue with in step mode. Required when the checkpoint was made before
+                        update/digest hashed the message given to the constructor, it is hashed from here then.
+        :raises ValueError: When the checkpoint doesn't match the spec or needs the message.
+        """
+        hasher = cls.from_spec(MD4Spec() if spec is None else spec)
+        hasher._restore(data, message)
+        return hasher
+
     def __repr__(self):
         return f'MD4(h1={self.h1:#x}, h2={self.h2:#x}, h3={self.h3:#x}, h4={self.h4:#x}, add_const0={self.add_const0:#x}, add_const1={self.add_const1:#x}, add_const2={self.add_const2:#x})'
 
 
+def _rotl32(x, amount: int):
+    """Rotate every uint32 lane of x left by amount."""
+    amount %= 32
+    if amount == 0:
+        return x
+    return (x << amount) | (x >> (32 - amount))
+
+
+def batch_hash(messages, as_hex: bool = False, native: bool = True, **params):
+    """
+    Hash many messages at once with the same (possibly custom) MD4 parameters,
+    e.g. NTLM-style password lists or rsync-like block checksums.
+    Messages are grouped by padded block count and every group runs the 48 steps
+    as column-wise uint32 operations, so there is no per-message Python work in the rounds.
+    :param messages: Iterable of str or bytes-like messages (empty messages are allowed).
+    :param as_hex: Return a list of hexadecimal strings instead of the digest array.
+    :param native: Hand standard parameters over to hashlib (False always runs the vectorized engine).
+    :param params: Any keyword parameters of MD4 (h1, h2, add_const*, order_list*, shift_list*).
+    :return: Contiguous (N, 16) uint8 array of digests, or a list of N hexadecimal strings.
+    """
+    hasher = MD4(native=native, **params)
+    if hasher._native is not None:
+        return native_batch(hasher._native, messages, hasher.digest_size, as_hex)
+    import numpy as np
+
+    rounds = [
+        (np.uint32(hasher.add_const0), hasher.order_list0, hasher.shift_list0),
+        (np.uint32(hasher.add_const1), hasher.order_list1, hasher.shift_list1),
+        (np.uint32(hasher.add_const2), hasher.order_list2, hasher.shift_list2),
+    ]
+
+    timing = instrumentation.enabled
+    if timing:
+        start = perf_counter_ns()
+    words, blocks = pack_messages(messages, 'little')
+    digests = np.empty((len(blocks), 4), dtype='<u4')
+
+    for count in np.unique(blocks):
+        lanes = np.flatnonzero(blocks == count)
+        # (blocks, 16, lanes) so that every message word is a contiguous row
+        group = np.ascontiguousarray(words[lanes, :count, :].transpose(1, 2, 0))
+        h = np.empty((4, len(lanes)), dtype=np.uint32)
+        h[0], h[1], h[2], h[3] = hasher.h1, hasher.h2, hasher.h3, hasher.h4
+
+        for X in group:
+            a, b, c, d = h
+            for cycle, (k, order, shifts) in enumerate(rounds):
+                for i in range(16):
+                    if cycle == 0:
+                        F = (b & c) | (~b & d)
+                    elif cycle == 1:
+                        F = (b & c) | (b & d) | (c & d)
+                    else:
+                        F = b ^ c ^ d
+                    a, b, c, d = d, _rotl32(a + F + X[order[i]] + k, shifts[i]), b, c
+            h = h + np.stack((a, b, c, d))
+
+        digests[lanes] = h.T
+
+    digests = digests.view(np.uint8)
+    if timing:
+        instrumentation.record(hasher.name, 'batch', perf_counter_ns() - start, messages=len(blocks),
+                               blocks=int(blocks.sum()))
+    if as_hex:
+        return [digest.tobytes().hex() for digest in digests]
+    return digests
+
     
 # MD4_hash = MD4('a4567')
 # # MD4_hash.run_all()
@@ -1,5 +1,15 @@
-import hashlib
-import numpy as np
+import functools
+import math
+import struct
+from time import perf_counter_ns
+from typing import Callable, NamedTuple
+
+import instrumentation
+from engine import HashEngine, check_table
+from native import native_batch, native_name
+from observers import Observers, print_registers, run_observed
+from padding import PaddedMessage, pack_messages
+from steptrace import StepTrace
 
 def chain_constraints(h1: str = '67452301', h2: str = 'efcdab89') -> tuple[str, str]:
     """
@@ -16,7 +26,103 @@ def _left_rotate(x: int, amount: int) -> int:
     x &= 0xFFFFFFFF
     return ((x << amount) | (x >> (32 - amount))) & 0xFFFFFFFF
 
-class MD5:
+
+class MD5Spec(NamedTuple):
+    """
+    Frozen, hashable description of an MD5 variant - the constructor parameters of MD5.
+    Lists are kept as tuples, so a spec can be used as a cache key.
+    """
+    h1: str = '67452301'
+    h2: str = 'efcdab89'
+    add_const: str = 'sin'
+    order_list0: tuple[int, ...] = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15)
+    order_list1: tuple[int, ...] = (1, 6, 11, 0, 5, 10, 15, 4, 9, 14, 3, 8, 13, 2, 7, 12)
+    order_list2: tuple[int, ...] = (5, 8, 11, 14, 1, 4, 7, 10, 13, 0, 3, 6, 9, 12, 15, 2)
+    order_list3: tuple[int, ...] = (0, 7, 14, 5, 12, 3, 10, 1, 8, 15, 6, 13, 4, 11, 2, 9)
+    shift_list0: tuple[int, ...] = (7, 12, 17, 22)
+    shift_list1: tuple[int, ...] = (5, 9, 14, 20)
+    shift_list2: tuple[int, ...] = (4, 11, 16, 23)
+    shift_list3: tuple[int, ...] = (6, 10, 15, 21)
+
+
+class CompiledMD5(NamedTuple):
+    """Tables of a compiled MD5Spec together with its generated compression function."""
+    h: tuple[int, int, int, int]
+    T: tuple[int, ...]
+    shifts: tuple[int, ...]
+    indexes: tuple[int, ...]
+    compress: Callable
+    native: str | None  # hashlib name when the tables are the standard ones and hashlib has the algorithm
+
+
+def _generate_compress(T, indexes, shifts) -> str:
+    """
+    Generate the source of a fully unrolled compression function.
+    Constants, word indices and rotation amounts are inlined as literals and the registers are
+    renamed at generation time instead of being shuffled at run time.
+    """
+    functions = ('{d} ^ ({b} & ({c} ^ {d}))',   # (b & c) | (~b & d)
+                 '{c} ^ ({d} & ({b} ^ {c}))',   # (b & d) | (c & ~d)
+                 '{b} ^ {c} ^ {d}',
+                 '{c} ^ ({b} | ~{d})')
+    words = ', '.join(f'X{i}' for i in range(16))
+    lines = ['def compress(state, block):',
+             f"    {words} = unpack('<16I', block)",
+             '    a, b, c, d = state']
+    names = ['a', 'b', 'c', 'd']
+    for i in range(64):
+        a, b, c, d = names
+        F = functions[i // 16].format(b=b, c=c, d=d)
+        # Only the value being rotated has to be masked, the registers are masked once at the end
+        lines.append(f'    t = ({a} + ({F}) + {T[i]:#010x} + X{indexes[i]}) & 0xFFFFFFFF')
+        lines.append(f'    {a} = {b} + ((t << {shifts[i]}) | (t >> {32 - shifts[i]}))')
+        names = [d, a, b, c]
+    lines.append('    return ((state[0] + {}) & 0xFFFFFFFF, (state[1] + {}) & 0xFFFFFFFF, '
+                 '(state[2] + {}) & 0xFFFFFFFF, (state[3] + {}) & 0xFFFFFFFF)'.format(*names))
+    return '\n'.join(lines) + '\n'
+
+
+@functools.lru_cache(maxsize=256)
+def compile_spec(spec: MD5Spec) -> CompiledMD5:
+    """
+    Parse an MD5Spec into its tables and generate its specialized compression function.
+    Results are kept in a bounded LRU cache, so hashers of an already seen variant are cheap to create.
+    """
+    h3, h4 = chain_constraints(spec.h1, spec.h2)
+    h = (int(spec.h1, 16), int(spec.h2, 16), int(h3, 16), int(h4, 16))
+
+    # Additive constraint
+    if spec.add_const == 'cos':
+        T = tuple(int((1 << 32) * abs(math.cos(i + 1))) & 0xFFFFFFFF for i in range(64))
+    elif spec.add_const == 'tan':
+        T = tuple(int((1 << 32) * abs(math.tan(i + 1))) & 0xFFFFFFFF for i in range(64))
+    else:
+        T = tuple(int((1 << 32) * abs(math.sin(i + 1))) & 0xFFFFFFFF for i in range(64))
+
+    shifts = sum((check_table(f'shift_list{i}', getattr(spec, f'shift_list{i}'), 4, 1, 31) * 4 for i in range(4)), ())
+    indexes = sum((check_table(f'order_list{i}', getattr(spec, f'order_list{i}'), 16, 0, 15) for i in range(4)), ())
+
+    namespace = {'unpack': struct.unpack}
+    exec(compile(_generate_compress(T, indexes, shifts), '<md5 compress>', 'exec'), namespace)
+
+    # Standard tables (however the spec spelled them) can be handed over to hashlib
+    standard = spec == MD5Spec() or (h, T, shifts, indexes) == compile_spec(MD5Spec())[:4]
+    native = native_name('md5') if standard else None
+    return CompiledMD5(h, T, shifts, indexes, namespace['compress'], native)
+
+
+class MD5(HashEngine):
+    name = 'md5'
+    digest_size = 16
+    block_size = 64
+    steps_per_block = 64
+    steps_per_round = 16
+    byteorder = 'little'
+    state_size = 4
+    _chain_attrs = ('h1', 'h2', 'h3', 'h4')
+    _registers = ('a', 'b', 'c', 'd')
+    _counters = ('block_counter', 'op_counter', 'word_counter')
+
     def __init__(self,
                  message: str = None,
                  h1: str = '67452301',
@@ -29,42 +135,30 @@ class MD5:
                  shift_list0: list[int] = [7, 12, 17, 22],
                  shift_list1: list[int] = [5, 9, 14, 20],
                  shift_list2: list[int] = [4, 11, 16, 23],
-                 shift_list3: list[int] = [6, 10, 15, 21]):
+                 shift_list3: list[int] = [6, 10, 15, 21], *, native: bool = True):
         
 
-        # Initialize chain constraints
-        h3, h4 = chain_constraints(h1, h2)
+        # Variant parameters are parsed and compiled once per distinct spec
+        self.spec = MD5Spec(h1, h2, add_const,
+                            tuple(order_list0), tuple(order_list1), tuple(order_list2), tuple(order_list3),
+                            tuple(shift_list0), tuple(shift_list1), tuple(shift_list2), tuple(shift_list3))
+        compiled = compile_spec(self.spec)
 
-        self.h1 = int(h1, 16)
-        self.h2 = int(h2, 16)
-        self.h3 = int(h3, 16)
-        self.h4 = int(h4, 16)
+        # Initialize chain constraints
+        self.h1, self.h2, self.h3, self.h4 = compiled.h
 
         self.a = self.h1
         self.b = self.h2
         self.c = self.h3
         self.d = self.h4
 
-        # Additive constraint
-        if add_const == 'sin':
-            self.T = [int((1 << 32) * abs(np.sin(i + 1))) & 0xFFFFFFFF for i in range(64)]
-        elif add_const == 'cos':
-            self.T = [int((1 << 32) * abs(np.cos(i + 1))) & 0xFFFFFFFF for i in range(64)]
-        elif add_const == 'tan':
-            self.T = [int((1 << 32) * abs(np.tan(i + 1))) & 0xFFFFFFFF for i in range(64)]
-        else:
-            self.T = [int((1 << 32) * abs(np.sin(i + 1))) & 0xFFFFFFFF for i in range(64)]
-
-        # List shift
-        self.shifts = (
-            shift_list0 * 4
-            + shift_list1 * 4
-            + shift_list2 * 4
-            + shift_list3 * 4
-        )
-
-        # List order
-        self.indexes = order_list0 + order_list1 + order_list2 + order_list3
+        # Additive constraint, list shift and list order
+        self.T = compiled.T
+        self.shifts = compiled.shifts
+        self.indexes = compiled.indexes
+        self._compress = compiled.compress
+        # hashlib name for run_all and batch_hash, native=False keeps the Python compressor (e.g. to benchmark it)
+        self._native = compiled.native if native else None
 
         self.block_counter = 0
         self.word_counter = 0
@@ -78,30 +172,41 @@ class MD5:
         else:
             self.message, self.number_of_blocks = self.__preprocess(message)
 
-    def ack_message(self, message: str):
-        self.message, self.number_of_blocks = self.__preprocess(message)
+        # Streaming state for update/digest: chain values, unfinished tail block and total length
+        self._stream_h = (self.h1, self.h2, self.h3, self.h4)
+        self._tail = b''
+        self._length = 0
+        self._seed = message  # absorbed by the first update/digest call
+        self._observers = None  # see add_observer
 
-    def __preprocess(self, message: str) -> tuple[bytes, int]:
-        """Pre-process the input message for MD4 hashing."""
-        if len(message) == 0:
-            raise ValueError("Message cannot be empty.")
-        original_byte_len = np.clip(len(message), 1, 2**64)
-        original_bit_len = original_byte_len * 8
+        # Chain constraints before blocks finished in step mode (block index -> chain), step_back needs them
+        # to cross block boundaries. The bulk paths don't record anything, missing ones are rebuilt on demand.
+        self._chain_history = {}
 
-        # Convert the message to bytes
-        message = message.encode('utf-8')
+    @classmethod
+    def from_spec(cls, spec: MD5Spec, message: str = None):
+        """Create a hasher for the given variant spec."""
+        return cls(message, *spec)
 
-        # Append the bit '1' to the message
-        message += b'\x80'
-
-        # Append zeros until the length is congruent to 448 modulo 512
-        while (len(message) * 8) % 512 != 448:
-            message += b'\x00'
+    def ack_message(self, message: str):
+        self.message, self.number_of_blocks = self.__preprocess(message)
+        self._chain_history = {}
 
-        # Append the original length as a 64-bit integer
-        message += original_bit_len.to_bytes(8, byteorder='little')
-        
-        return message, len(message) // 64
+    def __preprocess(self, message) -> tuple[PaddedMessage, int]:
+        """
+        Pre-process the input message for MD5 hashing.
+        The input (str or any bytes-like object) is not copied, blocks are views into it.
+        """
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
+        message = PaddedMessage(message, 'little')
+        if timing:
+            instrumentation.record(self.name, 'preprocess', perf_counter_ns() - start, bytes=message.length,
+                                   padding_bytes=message.number_of_blocks * 64 - message.length)
+        if message.length == 0:
+            raise ValueError("Message cannot be empty.")
+        return message, message.number_of_blocks
 
     def run_iter(self) -> bool:
         """
@@ -111,8 +216,11 @@ class MD5:
         if self.finished:
             return True
 
-        start = self.block_counter * 64
-        block = self.message[start : start + 64]
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
+
+        block = self.message[self.block_counter]
 
         M = [int.from_bytes(block[i*4:(i*4+4)], byteorder='little') for i in range(16)]
 
@@ -137,6 +245,7 @@ class MD5:
         self.a, self.b, self.c, self.d = self.d, (self.b + temp) & 0xFFFFFFFF, self.b, self.c
 
         if self.op_counter == 63:
+            self._chain_history[self.block_counter] = (self.h1, self.h2, self.h3, self.h4)
             self.h1 = (self.h1 + self.a) & 0xFFFFFFFF
             self.h2 = (self.h2 + self.b) & 0xFFFFFFFF
             self.h3 = (self.h3 + self.c) & 0xFFFFFFFF
@@ -146,43 +255,187 @@ class MD5:
 
             if self.block_counter == self.number_of_blocks:
                 self.finished = True
-                return True
             else:
                 self.a, self.b, self.c, self.d = self.h1, self.h2, self.h3, self.h4
                 self.op_counter = 0
                 self.word_counter = 0
-                return False
         else:
             self.op_counter += 1
             self.word_counter = (self.word_counter + 1) % 16
-            return False
 
+        if timing:
+            instrumentation.record(self.name, 'step', perf_counter_ns() - start, steps=1)
+        return self.finished
 
-    def run_all(self, vis: bool = False):
+    def step_back(self) -> bool:
         """
-        Run the MD4 algorithm on the given message.
-        :param message: The input message to hash.
-        :return: The MD4 hash of the message as a hexadecimal string.
+        Undo the last run_iter operation by inverting it: b is subtracted, the rotation is undone
+        and the round function, T[i] and the message word are subtracted again.
+        Block boundaries use the chain constraints recorded by run_iter; when the block was passed by
+        run_all or seek they are rebuilt with compress_block from the nearest known ones.
+        :return: True when the hasher is back before the first operation.
         """
-        while not self.finished:
-            if vis:
-                print(self.get_registers(False))
-            self.run_iter()
+        if self.block_counter == 0 and self.op_counter == 0:
+            return True
+
+        if self.finished or self.op_counter == 0:
+            # Crossing back over a block boundary: registers after the last operation are the chain difference
+            self.__dict__.pop('_native_start', None)
+            prev = self._chain_before(self.block_counter - 1)
+            self.a, self.b, self.c, self.d = ((h - p) & 0xFFFFFFFF for h, p in
+                                              zip((self.h1, self.h2, self.h3, self.h4), prev))
+            self.h1, self.h2, self.h3, self.h4 = prev
+            self.block_counter -= 1
+            self.op_counter = 63
+            self.word_counter = 15
+            self.finished = False
+        else:
+            self.op_counter -= 1
+            self.word_counter = (self.word_counter - 1) % 16
 
+        i = self.op_counter
+
+        # The operation moved (a, b, c, d) to (d, b + rotl(temp), b, c)
+        b, c, d = self.c, self.d, self.a
+        s = self.shifts[i]
+        temp = (self.b - b) & 0xFFFFFFFF
+        temp = ((temp >> s) | (temp << (32 - s))) & 0xFFFFFFFF  # Rotate right
+        if i <= 15:
+            F = (b & c) | ((~b) & d)
+        elif i <= 31:
+            F = (b & d) | (c & (~d))
+        elif i <= 47:
+            F = b ^ c ^ d
+        else:
+            F = c ^ (b | (~d))
+        g = self.indexes[i] * 4
+        M = int.from_bytes(self.message[self.block_counter][g:g + 4], byteorder='little')
+        self.a = (temp - F - self.T[i] - M) & 0xFFFFFFFF
+        self.b, self.c, self.d = b, c, d
+
+        return self.block_counter == 0 and self.op_counter == 0
+
+    def compress_block(self, state: tuple[int, int, int, int], block: bytes) -> tuple[int, int, int, int]:
+        """
+        Process a whole 64-byte block at once (all 64 operations).
+        Runs the compression function generated for this variant (see compile_spec),
+        with the T, indexes and shifts tables inlined as literals.
+        :param state: Chain constraints (h1, h2, h3, h4) before the block.
+        :param block: 64 bytes of the pre-processed message.
+        :return: Chain constraints after the block.
+        """
+        return self._compress(state, block)
+
+    def run_all(self, vis: bool = False):
+        """
+        Run the MD5 algorithm on the given message.
+        Without step or round observers the remaining whole blocks go through compress_block.
+        With standard parameters and nothing run in step mode yet the message is handed over to hashlib,
+        the working registers are None then (see rebuild_registers).
+        :param vis: Whether to print the registers after every operation.
+        :return: The MD5 hash of the message as a hexadecimal string.
+        """
+        if self.message is None:
+            raise ValueError("Message hasn't been acknowledged.")
+
+        observers = self._observers
+        if vis:
+            observers = Observers(observers)
+            observers.add(print_registers)
+        if observers:
+            run_observed(self, observers)
+        elif self._native is not None and self._step_index() == 0:
+            self._run_native()
+        else:
+            self._finish()
 
         # Convert the final hash to hexadecimal format
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
         digest = (self.h1.to_bytes(4, 'little') +
                   self.h2.to_bytes(4, 'little') +
                   self.h3.to_bytes(4, 'little') +
                   self.h4.to_bytes(4, 'little'))
+        if timing:
+            instrumentation.record(self.name, 'format', perf_counter_ns() - start)
         return digest.hex()
     
 
+    def _step_index(self) -> int:
+        """Number of operations done so far over the whole message."""
+        if self.finished:
+            return self.number_of_blocks * self.steps_per_block
+        return self.block_counter * self.steps_per_block + self.op_counter
+
+    def _rewind(self, block: int) -> None:
+        """Go back to the start of the given block, or to the nearest recorded block boundary before it."""
+        self.__dict__.pop('_native_start', None)  # the registers are set here, nothing to rebuild
+        if block == self.block_counter and not self.finished:
+            state = (self.h1, self.h2, self.h3, self.h4)
+        else:
+            # Start from the nearest recorded block boundary, seek skips forward from there
+            self.block_counter, state = self._nearest_chain(block)
+        self.h1, self.h2, self.h3, self.h4 = state
+        self.a, self.b, self.c, self.d = state
+        self.op_counter = 0
+        self.word_counter = 0
+        self.finished = False
+
+    def _nearest_chain(self, block: int) -> tuple[int, tuple[int, int, int, int]]:
+        """Latest recorded block boundary up to the given block (the start of the message when there is none)."""
+        start = max((known for known in self._chain_history if known <= block), default=0)
+        return start, self._chain_history.get(start, compile_spec(self.spec).h)
+
+    def _chain_before(self, block: int) -> tuple[int, int, int, int]:
+        """Chain constraints before the given block, compressed from the nearest recorded ones when missing."""
+        if block not in self._chain_history:
+            start, state = self._nearest_chain(block)
+            for i in range(start, block):
+                state = self.compress_block(state, self.message[i])
+            self._chain_history[block] = state
+        return self._chain_history[block]
+
+    def trace(self) -> StepTrace:
+        """
+        Run the whole message once and record the registers after every operation.
+        The hasher itself is not advanced, run_iter/run_all still start where they were.
+        :return: StepTrace with 64 rows of (a, b, c, d) per block and the chain constraints at block boundaries.
+        """
+        if self.message is None:
+            raise ValueError("Message hasn't been acknowledged.")
+
+        trace = StepTrace(self.number_of_blocks, 64, 4, 4)
+        T, g, shifts = self.T, self.indexes, self.shifts
+        h = compile_spec(self.spec).h
+        trace.chain[0] = h
+        for block_counter in range(self.number_of_blocks):
+            M = struct.unpack('<16I', self.message[block_counter])
+            a, b, c, d = h
+            rows = []
+            for i in range(64):
+                if i <= 15:
+                    F = (b & c) | ((~b) & d)
+                elif i <= 31:
+                    F = (b & d) | (c & (~d))
+                elif i <= 47:
+                    F = b ^ c ^ d
+                else:
+                    F = c ^ (b | (~d))
+                temp = _left_rotate((a + F + T[i] + M[g[i]]) & 0xFFFFFFFF, shifts[i])
+                a, b, c, d = d, (b + temp) & 0xFFFFFFFF, b, c
+                rows.append((a, b, c, d))
+            trace.registers[block_counter * 64:(block_counter + 1) * 64] = rows
+            h = tuple((x + y) & 0xFFFFFFFF for x, y in zip(h, (a, b, c, d)))
+            trace.chain[block_counter + 1] = h
+        return trace
+
     def get_registers(self, littleEndian: bool = True) -> str:
         """
         Get the current values of the registers.
         :return: A tuple containing the current values of the registers.
         """
+        self._require_registers()
         if littleEndian:
             endianess = 'little'
         else:
@@ -208,10 +461,114 @@ class MD5:
                   self.h4.to_bytes(4, 'little'))
         return digest.hex()
 
+    def copy(self):
+        other = super().copy()
+        other._chain_history = dict(self._chain_history)
+        return other
+
+    # Checkpoint layout: version, spec fingerprint, streaming chain values, total length, tail length and tail,
+    # whether the constructor message is still to be hashed by update/digest (the length is then its length),
+    # then the step-mode chain values, registers, block counter, operation and word counters and the finished flag
+    # (2 when a run delegated to hashlib left the registers to be rebuilt)
+    _CHECKPOINT = struct.Struct('<B8s4IQB63sB4I4IQBBB')
+
+    def _restore(self, data: bytes, message=None) -> None:
+        super()._restore(data, message)
+        self._chain_history = {}
+
+    @classmethod
+    def from_bytes(cls, data: bytes, spec: MD5Spec = None, message=None):
+        """
+        Restore a hasher from a to_bytes() checkpoint.
+        :param data: Checkpoint bytes.
+        :param spec: Variant spec the checkpoint was made with (standard MD5 when omitted).
+        :param message: Message to continue with in step mode. Required when the checkpoint was made before
+                        update/digest hashed the message given to the constructor, it is hashed from here then.
+        :raises ValueError: When the checkpoint doesn't match the spec or needs the message.
+        """
+        hasher = cls.from_spec(MD5Spec() if spec is None else spec)
+        hasher._restore(data, message)
+        return hasher
+
     def __repr__(self):
         return f'MD4(h1={self.h1:#x}, h2={self.h2:#x}, h3={self.h3:#x}, h4={self.h4:#x}, add_const0={self.add_const0:#x}, add_const1={self.add_const1:#x}, add_const2={self.add_const2:#x})'
 
 
+def _rotl32(x, amount: int):
+    """Rotate every uint32 lane of x left by amount."""
+    amount %= 32
+    if amount == 0:
+        return x
+    return (x << amount) | (x >> (32 - amount))
+
+
+def batch_hash(messages, as_hex: bool = False, native: bool = True, **params):
+    """
+    Hash many messages at once with the same (possibly custom) MD5 parameters.
+    Messages are padded and packed into an (N, blocks, 16) uint32 array and the 64 operations
+    run as vectorized uint32 operations across all lanes. Lanes are sorted by block count,
+    so every block only touches the messages that are still long enough.
+    :param messages: Iterable of str or bytes-like messages (empty messages are allowed).
+    :param as_hex: Return a list of hexadecimal strings instead of the digest array.
+    :param native: Hand standard parameters over to hashlib (False always runs the vectorized engine).
+    :param params: Any keyword parameters of MD5 (h1, h2, add_const, order_list*, shift_list*).
+    :return: (N, 16) uint8 array of digests, or a list of N hexadecimal strings.
+    """
+    hasher = MD5(native=native, **params)
+    if hasher._native is not None:
+        return native_batch(hasher._native, messages, hasher.digest_size, as_hex)
+    import numpy as np
+
+    T = [np.uint32(t) for t in hasher.T]
+    g = hasher.indexes
+    s = hasher.shifts
+
+    timing = instrumentation.enabled
+    if timing:
+        start = perf_counter_ns()
+    words, blocks = pack_messages(messages, 'little')
+    n = len(blocks)
+    order = np.argsort(-blocks, kind='stable')
+    words = words[order]
+    active = np.count_nonzero(blocks[:, None] > np.arange(words.shape[1]), axis=0)
+
+    h = np.empty((4, n), dtype=np.uint32)
+    h[0], h[1], h[2], h[3] = hasher.h1, hasher.h2, hasher.h3, hasher.h4
+
+    for block in range(words.shape[1]):
+        k = active[block]
+        # (16, k) so that every message word is a contiguous row
+        M = np.ascontiguousarray(words[:k, block, :].T)
+        a, b, c, d = h[0, :k], h[1, :k], h[2, :k], h[3, :k]
+
+        for i in range(64):
+            if i < 16:
+                F = (b & c) | (~b & d)
+            elif i < 32:
+                F = (b & d) | (c & ~d)
+            elif i < 48:
+                F = b ^ c ^ d
+            else:
+                F = c ^ (b | ~d)
+            temp = a + F + T[i] + M[g[i]]
+            a, b, c, d = d, b + _rotl32(temp, s[i]), b, c
+
+        h[0, :k] += a
+        h[1, :k] += b
+        h[2, :k] += c
+        h[3, :k] += d
+
+    digests = np.empty((n, 4), dtype='<u4')
+    digests[order] = h.T
+    digests = digests.view(np.uint8)
+    if timing:
+        instrumentation.record(hasher.name, 'batch', perf_counter_ns() - start, messages=len(blocks),
+                               blocks=int(blocks.sum()))
+    if as_hex:
+        return [digest.tobytes().hex() for digest in digests]
+    return digests
+
+
 
 
 # if __name__ == "__main__":
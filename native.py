@@ -0,0 +1,31 @@
+import hashlib
+
+from padding import as_bytes_view
+
+
+def native_name(algorithm: str):
+    """
+    Check whether hashlib can compute the algorithm in this Python / OpenSSL build
+    (MD4 is missing from most OpenSSL 3 builds, RIPEMD160 from some).
+    :param algorithm: md4, md5, sha1 or ripemd160.
+    :return: The name to pass to hashlib.new, or None.
+    """
+    try:
+        hashlib.new(algorithm)
+    except ValueError:
+        return None
+    return algorithm
+
+
+def native_batch(algorithm: str, messages, digest_size: int, as_hex: bool = False):
+    """
+    batch_hash for standard parameters: every message goes through hashlib.
+    :return: (N, digest_size) uint8 array of digests, or a list of N hexadecimal strings.
+    """
+    digests = [hashlib.new(algorithm, as_bytes_view(message)).digest() for message in messages]
+    if as_hex:
+        return [digest.hex() for digest in digests]
+
+    import numpy as np
+
+    return np.frombuffer(bytearray(b''.join(digests)), dtype=np.uint8).reshape(len(digests), digest_size)
@@ -0,0 +1,86 @@
+class Observers:
+    """
+    Callbacks attached to a hasher and notified by run_all.
+    Step hooks are called as hook(hasher, block, step) after a step,
+    round hooks as hook(hasher, block, round) after the last step of a round
+    and block hooks as hook(hasher, block, chain) after a block, with the chain values it produced.
+    Every hook can be sampled: with every=N it is called on every Nth step, round or block of the message.
+    """
+    LEVELS = ('step', 'round', 'block')
+
+    def __init__(self, other: 'Observers' = None):
+        self.step = [] if other is None else list(other.step)
+        self.round = [] if other is None else list(other.round)
+        self.block = [] if other is None else list(other.block)
+
+    def __bool__(self) -> bool:
+        return bool(self.step or self.round or self.block)
+
+    @property
+    def stepwise(self) -> bool:
+        """Whether any hook needs the message to be processed step by step."""
+        return bool(self.step or self.round)
+
+    def add(self, hook, level: str = 'step', every: int = 1) -> None:
+        """
+        Attach a hook.
+        :param hook: Callable, see the class docstring for its arguments.
+        :param level: 'step', 'round' or 'block'.
+        :param every: Call the hook only on every Nth event.
+        """
+        if level not in self.LEVELS:
+            raise ValueError(f"Unknown observer level {level!r}, expected one of {', '.join(self.LEVELS)}.")
+        if every < 1:
+            raise ValueError("every has to be a positive number.")
+        getattr(self, level).append((hook, every))
+
+    def remove(self, hook) -> None:
+        """Detach a hook from all levels."""
+        for level in self.LEVELS:
+            setattr(self, level, [(h, every) for h, every in getattr(self, level) if h is not hook])
+
+    def step_done(self, hasher, block: int, step: int) -> None:
+        index = block * hasher.steps_per_block + step + 1  # steps done over the whole message
+        for hook, every in self.step:
+            if index % every == 0:
+                hook(hasher, block, step)
+        if self.round and (step + 1) % hasher.steps_per_round == 0:
+            rounds = index // hasher.steps_per_round
+            for hook, every in self.round:
+                if rounds % every == 0:
+                    hook(hasher, block, step // hasher.steps_per_round)
+        if step == hasher.steps_per_block - 1:
+            self.block_done(hasher, block)
+
+    def block_done(self, hasher, block: int) -> None:
+        chain = hasher.get_chain()
+        for hook, every in self.block:
+            if (block + 1) % every == 0:
+                hook(hasher, block, chain)
+
+
+def print_registers(hasher, block: int, step: int) -> None:
+    """Step hook behind run_all(vis=True)."""
+    print(hasher.get_registers(False))
+
+
+def run_observed(hasher, observers: Observers) -> None:
+    """
+    Run the hasher up to the end of the message, notifying the observers.
+    With only block hooks attached, every block but the last goes through compress_block,
+    the last one is run step by step so the registers end up as in step mode.
+    """
+    steps_per_block = hasher.steps_per_block
+    number_of_blocks = hasher.number_of_blocks
+    stepwise = observers.stepwise
+    index = hasher._step_index()
+    while index < number_of_blocks * steps_per_block:
+        block, step = divmod(index, steps_per_block)
+        if not stepwise and step == 0 and block < number_of_blocks - 1:
+            hasher._skip_blocks(block + 1)
+            observers.block_done(hasher, block)
+            index += steps_per_block
+        else:
+            hasher.run_iter()
+            observers.step_done(hasher, block, step)
+            index += 1
@@ -0,0 +1,100 @@
+def as_bytes_view(message) -> memoryview:
+    """
+    Get a flat byte view of the message without copying it.
+    :param message: str (encoded as UTF-8) or any bytes-like / buffer-protocol object
+                    (bytes, bytearray, memoryview, mmap, numpy uint8 array, ...).
+    :return: 1-D memoryview of unsigned bytes.
+    """
+    if isinstance(message, str):
+        return memoryview(message.encode('utf-8'))
+    view = memoryview(message)
+    if not view.c_contiguous:
+        # Strided buffers can't be cast, this is the only case where the input gets copied
+        view = memoryview(view.tobytes())
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    return view
+
+
+def padding(length: int, byteorder: str) -> bytes:
+    """
+    Build the Merkle-Damgard padding for a message of the given length.
+    The pad length is computed directly: 0x80, zeros up to 56 mod 64 and the 64-bit bit length.
+    :param length: Message length in bytes.
+    :param byteorder: 'little' (MD4, MD5, RIPEMD160) or 'big' (SHA1) for the length field.
+    :return: 9 to 72 bytes of padding.
+    """
+    bit_length = (length * 8) & 0xFFFFFFFFFFFFFFFF
+    return b'\x80' + bytes((55 - length) % 64) + bit_length.to_bytes(8, byteorder)
+
+
+class PaddedMessage:
+    """
+    Pre-processed message as a sequence of 64-byte blocks.
+    Whole blocks are memoryview slices of the original input, only the last one or two blocks
+    (the tail and the padding) are stored separately.
+    """
+    def __init__(self, message, byteorder: str):
+        self.data = as_bytes_view(message)
+        self.length = len(self.data)
+        self.full_blocks = self.length // 64
+        self.tail = memoryview(bytes(self.data[self.full_blocks * 64:]) + padding(self.length, byteorder))
+        self.number_of_blocks = self.full_blocks + len(self.tail) // 64
+
+    def __len__(self) -> int:
+        return self.number_of_blocks
+
+    def __getitem__(self, i: int) -> memoryview:
+        if i < 0:
+            i += self.number_of_blocks
+        if i < self.full_blocks:
+            return self.data[i * 64:(i + 1) * 64]
+        if i < self.number_of_blocks:
+            i -= self.full_blocks
+            return self.tail[i * 64:(i + 1) * 64]
+        raise IndexError('block index out of range')
+
+    def __iter__(self):
+        data = self.data
+        for i in range(0, self.full_blocks * 64, 64):
+            yield data[i:i + 64]
+        tail = self.tail
+        for i in range(0, len(tail), 64):
+            yield tail[i:i + 64]
+
+
+def pack_messages(messages, byteorder: str):
+    """
+    Pad many messages and pack them into one word array for the batch engines.
+    :param messages: Iterable of str or bytes-like messages.
+    :param byteorder: 'little' (MD4, MD5, RIPEMD160) or 'big' (SHA1) for the length field and the words.
+    :return: (words, blocks) - uint32 array of shape (N, max_blocks, 16) and the block count of every message.
+             Blocks past the end of a shorter message are left as zeros.
+    """
+    import numpy as np
+
+    views = [as_bytes_view(message) for message in messages]
+    lengths = np.fromiter((len(view) for view in views), dtype=np.int64, count=len(views))
+    blocks = (lengths + 8) // 64 + 1
+    width = int(blocks.max(initial=1)) * 64
+
+    buffer = np.zeros((len(views), width), dtype=np.uint8)
+    flat = buffer.reshape(-1)
+    row_starts = np.arange(len(views), dtype=np.int64) * width
+
+    # Scatter all messages into their rows in one go
+    total = int(lengths.sum())
+    if total:
+        source = np.frombuffer(b''.join(views), dtype=np.uint8)
+        source_starts = np.cumsum(lengths) - lengths
+        flat[np.repeat(row_starts - source_starts, lengths) + np.arange(total)] = source
+
+    # 0x80 marker and 64-bit bit length at the end of the last block
+    flat[row_starts + lengths] = 0x80
+    length_dtype = '<u8' if byteorder == 'little' else '>u8'
+    bit_lengths = (lengths.astype(np.uint64) * np.uint64(8)).astype(length_dtype).view(np.uint8).reshape(-1, 8)
+    flat[(row_starts + blocks * 64 - 8)[:, None] + np.arange(8)] = bit_lengths
+
+    word_dtype = '<u4' if byteorder == 'little' else '>u4'
+    words = buffer.view(word_dtype).astype(np.uint32, copy=False).reshape(len(views), width // 64, 16)
+    return words, blocks
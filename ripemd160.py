@@ -1,4 +1,14 @@
-import numpy as np
+import functools
+import struct
+from time import perf_counter_ns
+from typing import Callable, NamedTuple
+
+import instrumentation
+from engine import HashEngine, check_table
+from native import native_batch, native_name
+from observers import Observers, print_registers, run_observed
+from padding import PaddedMessage, pack_messages
+from steptrace import StepTrace
 
 def chain_constraints(h1: str = '67452301', h2: str = 'efcdab89') -> tuple[str, str]:
     """
@@ -11,9 +21,147 @@ def chain_constraints(h1: str = '67452301', h2: str = 'efcdab89') -> tuple[str,
     h4 = ''.join(list(h1)[::-1])
     return h3, h4
 
-class RIPEMD160:
+def _f1(x, y, z): return x ^ y ^ z
+def _f2(x, y, z): return (x & y) | (~x & z)
+def _f3(x, y, z): return (x | ~y) ^ z
+def _f4(x, y, z): return (x & z) | (y & ~z)
+def _f5(x, y, z): return x ^ (y | ~z)
+
+# Boolean function of every round (the left line uses them in order, the right line in reverse)
+ROUND_FUNCTIONS = (_f1, _f2, _f3, _f4, _f5)
+
+
+class RIPEMD160Spec(NamedTuple):
+    """
+    Frozen, hashable description of a RIPEMD-160 variant - the constructor parameters of RIPEMD160.
+    Lists are kept as tuples, so a spec can be used as a cache key.
+    """
+    h1: str = '67452301'
+    h2: str = 'efcdab89'
+    h5: str = 'c3d2e1f0'
+    add_const0: str = '00000000'
+    add_const1: str = '5a827999'
+    add_const2: str = '6ed9eba1'
+    add_const3: str = '8f1bbcdc'
+    add_const4: str = 'a953fd4e'
+    add_const0r: str = '50a28be6'
+    add_const1r: str = '5c4dd124'
+    add_const2r: str = '6d703ef3'
+    add_const3r: str = '7a6d76e9'
+    add_const4r: str = '00000000'
+    order_list0: tuple[int, ...] = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15)
+    order_list1: tuple[int, ...] = (7, 4, 13, 1, 10, 6, 15, 3, 12, 0, 9, 5, 2, 14, 11, 8)
+    order_list2: tuple[int, ...] = (3, 10, 14, 4, 9, 15, 8, 1, 2, 7, 0, 6, 13, 11, 5, 12)
+    order_list3: tuple[int, ...] = (1, 9, 11, 10, 0, 8, 12, 4, 13, 3, 7, 15, 14, 5, 6, 2)
+    order_list4: tuple[int, ...] = (4, 0, 5, 9, 7, 12, 2, 10, 14, 1, 3, 8, 11, 6, 15, 13)
+    order_list0r: tuple[int, ...] = (5, 14, 7, 0, 9, 2, 11, 4, 13, 6, 15, 8, 1, 10, 3, 12)
+    order_list1r: tuple[int, ...] = (6, 11, 3, 7, 0, 13, 5, 10, 14, 15, 8, 12, 4, 9, 1, 2)
+    order_list2r: tuple[int, ...] = (15, 5, 1, 3, 7, 14, 6, 9, 11, 8, 12, 2, 10, 0, 4, 13)
+    order_list3r: tuple[int, ...] = (8, 6, 4, 1, 3, 11, 15, 0, 5, 12, 2, 13, 9, 7, 10, 14)
+    order_list4r: tuple[int, ...] = (12, 15, 10, 4, 1, 5, 8, 7, 6, 2, 13, 14, 0, 3, 9, 11)
+    shift_list0: tuple[int, ...] = (11, 14, 15, 12, 5, 8, 7, 9, 11, 13, 14, 15, 6, 7, 9, 8)
+    shift_list1: tuple[int, ...] = (7, 6, 8, 13, 11, 9, 7, 15, 7, 12, 15, 9, 11, 7, 13, 12)
+    shift_list2: tuple[int, ...] = (11, 13, 6, 7, 14, 9, 13, 15, 14, 8, 13, 6, 5, 12, 7, 5)
+    shift_list3: tuple[int, ...] = (11, 12, 14, 15, 14, 15, 9, 8, 9, 14, 5, 6, 8, 6, 5, 12)
+    shift_list4: tuple[int, ...] = (9, 15, 5, 11, 6, 8, 13, 12, 5, 12, 13, 14, 11, 8, 5, 6)
+    shift_list0r: tuple[int, ...] = (8, 9, 9, 11, 13, 15, 15, 5, 7, 7, 8, 11, 14, 14, 12, 6)
+    shift_list1r: tuple[int, ...] = (9, 13, 15, 7, 12, 8, 9, 11, 7, 7, 12, 7, 6, 15, 13, 11)
+    shift_list2r: tuple[int, ...] = (9, 7, 15, 11, 8, 6, 6, 14, 12, 13, 5, 14, 13, 13, 7, 5)
+    shift_list3r: tuple[int, ...] = (15, 5, 8, 11, 14, 14, 6, 14, 6, 9, 12, 9, 12, 5, 15, 8)
+    shift_list4r: tuple[int, ...] = (8, 5, 12, 9, 12, 5, 14, 6, 8, 13, 6, 5, 15, 13, 11, 11)
+
+
+class CompiledRIPEMD160(NamedTuple):
+    """Tables of a compiled RIPEMD160Spec together with its generated compression function."""
+    h: tuple[int, int, int, int, int]
+    K: tuple[int, ...]
+    Kp: tuple[int, ...]
+    r: tuple[int, ...]
+    rp: tuple[int, ...]
+    s: tuple[int, ...]
+    sp: tuple[int, ...]
+    compress: Callable
+    native: str | None  # hashlib name when the tables are the standard ones and hashlib has the algorithm
+
+
+# Source templates of the round functions, in the same order as ROUND_FUNCTIONS
+_ROUND_TEMPLATES = ('{x} ^ {y} ^ {z}',
+                    '({x} & {y}) | (~{x} & {z})',
+                    '({x} | ~{y}) ^ {z}',
+                    '({x} & {z}) | ({y} & ~{z})',
+                    '{x} ^ ({y} | ~{z})')
+
+
+def _generate_compress(K, Kp, r, rp, s, sp) -> str:
+    """
+    Generate the source of a fully unrolled compression function for both lines.
+    Constants, word indices and rotation amounts are inlined as literals and the registers are
+    renamed at generation time instead of being shuffled at run time.
+    """
+    words = ', '.join(f'X{i}' for i in range(16))
+    lines = ['def compress(state, block):',
+             f"    {words} = unpack('<16I', block)",
+             '    al, bl, cl, dl, el = state',
+             '    ar, br, cr, dr, er = state']
+    left = ['al', 'bl', 'cl', 'dl', 'el']
+    right = ['ar', 'br', 'cr', 'dr', 'er']
+    for j in range(80):
+        for names, template, k, x, rot in ((left, _ROUND_TEMPLATES[j // 16], K[j // 16], r[j], s[j]),
+                                           (right, _ROUND_TEMPLATES[4 - j // 16], Kp[j // 16], rp[j], sp[j])):
+            A, B, C, D, E = names
+            F = template.format(x=B, y=C, z=D)
+            lines.append(f'    t = ({A} + ({F}) + X{x} + {k:#010x}) & 0xFFFFFFFF')
+            lines.append(f'    {A} = (((t << {rot}) | (t >> {32 - rot})) + {E}) & 0xFFFFFFFF')
+            # C is always a masked value here; the rotated one is only added or mixed bitwise later
+            lines.append(f'    {C} = ({C} << 10) | ({C} >> 22)')
+            names[:] = [E, A, B, C, D]
+    A, B, C, D, E = left
+    Ap, Bp, Cp, Dp, Ep = right
+    # Combine left and right results
+    lines.append(f'    return ((state[1] + {C} + {Dp}) & 0xFFFFFFFF, (state[2] + {D} + {Ep}) & 0xFFFFFFFF, '
+                 f'(state[3] + {E} + {Ap}) & 0xFFFFFFFF, (state[4] + {A} + {Bp}) & 0xFFFFFFFF, '
+                 f'(state[0] + {B} + {Cp}) & 0xFFFFFFFF)')
+    return '\n'.join(lines) + '\n'
+
+
+@functools.lru_cache(maxsize=256)
+def compile_spec(spec: RIPEMD160Spec) -> CompiledRIPEMD160:
+    """
+    Parse a RIPEMD160Spec into its tables and generate its specialized compression function.
+    Results are kept in a bounded LRU cache, so hashers of an already seen variant are cheap to create.
+    """
+    h3, h4 = chain_constraints(spec.h1, spec.h2)
+    h = (int(spec.h1, 16), int(spec.h2, 16), int(h3, 16), int(h4, 16), int(spec.h5, 16))
+    K = tuple(int(k, 16) for k in (spec.add_const0, spec.add_const1, spec.add_const2, spec.add_const3, spec.add_const4))
+    Kp = tuple(int(k, 16) for k in (spec.add_const0r, spec.add_const1r, spec.add_const2r, spec.add_const3r, spec.add_const4r))
+    r, rp, s, sp = (sum((check_table(name.format(i), getattr(spec, name.format(i)), 16, low, high) for i in range(5)), ())
+                    for name, low, high in (('order_list{}', 0, 15), ('order_list{}r', 0, 15),
+                                            ('shift_list{}', 1, 31), ('shift_list{}r', 1, 31)))
+
+    namespace = {'unpack': struct.unpack}
+    exec(compile(_generate_compress(K, Kp, r, rp, s, sp), '<ripemd160 compress>', 'exec'), namespace)
+
+    # Standard tables (however the spec spelled them) can be handed over to hashlib
+    standard = spec == RIPEMD160Spec() or (h, K, Kp, r, rp, s, sp) == compile_spec(RIPEMD160Spec())[:7]
+    native = native_name('ripemd160') if standard else None
+    return CompiledRIPEMD160(h, K, Kp, r, rp, s, sp, namespace['compress'], native)
+
+
+
+class RIPEMD160(HashEngine):
+    name = 'ripemd160'
+    digest_size = 20
+    block_size = 64
+    steps_per_block = 80
+    steps_per_round = 16
+    byteorder = 'little'
+    state_size = 5
+    _chain_attrs = ('h0', 'h1', 'h2', 'h3', 'h4')
+    _registers = ('A', 'B', 'C', 'D', 'E', 'Ap', 'Bp', 'Cp', 'Dp', 'Ep')
+    _counters = ('block_counter', 'step_counter')
+
     def __init__(self, message: str = None,  h1: str = '67452301', h2: str = 'efcdab89',  h5: str = 'c3d2e1f0',
-                add_const0: str = '00000000', add_const1: str = '5a827999', add_const2: str = '6ed9eba1', add_const3: str = '8f1bbcdc', add_const4: str = '0953fd4e',
+                add_const0: str = '00000000', add_const1: str = '5a827999', add_const2: str = '6ed9eba1', add_const3: str = '8f1bbcdc', add_const4: str = 'a953fd4e',
                 add_const0r: str = '50a28be6', add_const1r: str = '5c4dd124', add_const2r: str = '6d703ef3', add_const3r: str = '7a6d76e9', add_const4r: str = '00000000',
                 order_list0: list[int] = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15],
                 order_list1: list[int] = [7, 4, 13, 1, 10, 6, 15, 3, 12, 0, 9, 5, 2, 14, 11, 8],
@@ -34,16 +182,20 @@ class RIPEMD160:
                 shift_list1r: list[int] = [9,13,15, 7,12, 8, 9,11, 7, 7,12, 7, 6,15,13,11],
                 shift_list2r: list[int] = [9, 7,15,11, 8, 6, 6,14,12,13, 5,14,13,13, 7, 5],
                 shift_list3r: list[int] = [15, 5, 8,11,14,14, 6,14, 6, 9,12, 9,12, 5,15, 8],
-                shift_list4r: list[int] = [8, 5,12, 9,12, 5,14, 6, 8,13, 6, 5,15,13,11,11]):
-
-        h3, h4 = chain_constraints(h1, h2)
+                shift_list4r: list[int] = [8, 5,12, 9,12, 5,14, 6, 8,13, 6, 5,15,13,11,11], *, native: bool = True):
+
+        # Variant parameters are parsed and compiled once per distinct spec
+        self.spec = RIPEMD160Spec(h1, h2, h5, add_const0, add_const1, add_const2, add_const3, add_const4,
+                                  add_const0r, add_const1r, add_const2r, add_const3r, add_const4r,
+                                  tuple(order_list0), tuple(order_list1), tuple(order_list2), tuple(order_list3),
+                                  tuple(order_list4), tuple(order_list0r), tuple(order_list1r), tuple(order_list2r),
+                                  tuple(order_list3r), tuple(order_list4r), tuple(shift_list0), tuple(shift_list1),
+                                  tuple(shift_list2), tuple(shift_list3), tuple(shift_list4), tuple(shift_list0r),
+                                  tuple(shift_list1r), tuple(shift_list2r), tuple(shift_list3r), tuple(shift_list4r))
+        compiled = compile_spec(self.spec)
 
         # Initial hash values (in hex, little-endian)
-        self.h0 = int(h1, 16)
-        self.h1 = int(h2, 16)
-        self.h2 = int(h3, 16)
-        self.h3 = int(h4, 16)
-        self.h4 = int(h5, 16)
+        self.h0, self.h1, self.h2, self.h3, self.h4 = compiled.h
 
         # Working registers for left and right branches
         self.A = self.h0
@@ -59,20 +211,20 @@ class RIPEMD160:
         self.Ep = self.h4
 
         # Constants for each round
-        self.K = [int(add_const0, 16), int(add_const1, 16), int(add_const2, 16), int(add_const3, 16), int(add_const4, 16)]
-        self.Kp = [int(add_const0r, 16), int(add_const1r, 16), int(add_const2r, 16), int(add_const3r, 16), int(add_const4r, 16)]
-
-        # Message word order for left line
-        self.r = order_list0 + order_list1 + order_list2 + order_list3 + order_list4
+        self.K = compiled.K
+        self.Kp = compiled.Kp
 
-        # Message word order for right line
-        self.rp = order_list0r + order_list1r + order_list2r + order_list3r + order_list4r
+        # Message word order for left and right line
+        self.r = compiled.r
+        self.rp = compiled.rp
 
-        # Rotation amounts for left line
-        self.s = shift_list0 + shift_list1 + shift_list2 + shift_list3 + shift_list4
+        # Rotation amounts for left and right line
+        self.s = compiled.s
+        self.sp = compiled.sp
 
-        # Rotation amounts for right line
-        self.sp = shift_list0r + shift_list1r + shift_list2r + shift_list3r + shift_list4r
+        self._compress = compiled.compress
+        # hashlib name for run_all and batch_hash, native=False keeps the Python compressor (e.g. to benchmark it)
+        self._native = compiled.native if native else None
 
         self.finished = False
         if message is None:
@@ -84,22 +236,35 @@ class RIPEMD160:
         self.block_counter = 0
         self.step_counter = 0  # 0–79 for 80 steps total
 
-    def __preprocess(self, message: str) -> tuple[bytes, int]:
-        if len(message) == 0:
+        # Streaming state for update/digest: chain values, unfinished tail block and total length
+        self._stream_h = (self.h0, self.h1, self.h2, self.h3, self.h4)
+        self._tail = b''
+        self._length = 0
+        self._seed = message  # absorbed by the first update/digest call
+        self._observers = None  # see add_observer
+
+    @classmethod
+    def from_spec(cls, spec: RIPEMD160Spec, message: str = None):
+        """Create a hasher for the given variant spec."""
+        return cls(message, *spec)
+
+    def ack_message(self, message: str):
+        self.message, self.number_of_blocks = self.__preprocess(message)
+
+    def __preprocess(self, message) -> tuple[PaddedMessage, int]:
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
+        message = PaddedMessage(message, 'little')
+        if timing:
+            instrumentation.record(self.name, 'preprocess', perf_counter_ns() - start, bytes=message.length,
+                                   padding_bytes=message.number_of_blocks * 64 - message.length)
+        if message.length == 0:
             raise ValueError("Message cannot be empty.")
-        bit_length = len(message) * 8
-        message = message.encode('utf-8') + b'\x80'
-        while (len(message) * 8) % 512 != 448:
-            message += b'\x00'
-        message += bit_length.to_bytes(8, byteorder='little')
-        return message, len(message) // 64
+        return message, message.number_of_blocks
 
     def F(self, j, x, y, z):
-        if 0 <= j <= 15:   return x ^ y ^ z
-        elif 16 <= j <= 31: return (x & y) | (~x & z)
-        elif 32 <= j <= 47: return (x | ~y) ^ z
-        elif 48 <= j <= 63: return (x & z) | (y & ~z)
-        elif 64 <= j <= 79: return x ^ (y | ~z)
+        return ROUND_FUNCTIONS[j // 16](x, y, z)
 
     def rotate_left(self, x, n):
         return ((x << n) | (x >> (32 - n))) & 0xFFFFFFFF
@@ -108,7 +273,11 @@ class RIPEMD160:
         if self.finished:
             return True
 
-        block = self.message[self.block_counter * 64 : (self.block_counter + 1) * 64]
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
+
+        block = self.message[self.block_counter]
         X = [int.from_bytes(block[i*4:i*4+4], byteorder='little') for i in range(16)]
 
         j = self.step_counter
@@ -155,35 +324,122 @@ class RIPEMD160:
                 self.Dp = self.h3
                 self.Ep = self.h4
 
+        if timing:
+            instrumentation.record(self.name, 'step', perf_counter_ns() - start, steps=1)
         return self.finished
 
+    def compress_block(self, state: tuple[int, int, int, int, int], block: bytes) -> tuple[int, int, int, int, int]:
+        """
+        Process a whole 64-byte block at once (80 steps of both lines).
+        Runs the compression function generated for this variant (see compile_spec),
+        with the boolean functions, constants, word orders and rotations of both lines inlined.
+        :param state: Hash values (h0, h1, h2, h3, h4) before the block.
+        :param block: 64 bytes of the pre-processed message.
+        :return: Hash values after the block.
+        """
+        return self._compress(state, block)
 
     def run_all(self, vis: bool = False):
         """
         Run the RIPEMD-160 algorithm on the given message.
+        Without step or round observers the remaining whole blocks but the last one go through compress_block.
+        With standard parameters and nothing run in step mode yet the message is handed over to hashlib,
+        the working registers are None then (see rebuild_registers).
         :param vis: Whether to print internal state at each iteration.
         :return: The RIPEMD-160 hash of the message as a hexadecimal string.
         """
-        while not self.finished:
-            if vis:
-                print(self.get_registers(False))
-            self.run_iter()
+        if self.message is None:
+            raise ValueError("Message hasn't been acknowledged.")
+
+        observers = self._observers
+        if vis:
+            observers = Observers(observers)
+            observers.add(print_registers)
+        if observers:
+            run_observed(self, observers)
+        elif self._native is not None and self._step_index() == 0:
+            self._run_native()
+        else:
+            self._finish()
 
         # Convert the final hash to hexadecimal format
         endianess = 'little'
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
         digest = (self.h0.to_bytes(4, endianess) +
                 self.h1.to_bytes(4, endianess) +
                 self.h2.to_bytes(4, endianess) +
                 self.h3.to_bytes(4, endianess) +
                 self.h4.to_bytes(4, endianess))
+        if timing:
+            instrumentation.record(self.name, 'format', perf_counter_ns() - start)
         return digest.hex()
 
+    def _finish(self) -> None:
+        """
+        Run the rest of the message: whole blocks go through compress_block, the last one is run step by step,
+        since the chain values don't give back the registers of both lines.
+        """
+        self.seek(self.number_of_blocks)
+
+    def _step_index(self) -> int:
+        """Number of steps done so far over the whole message."""
+        if self.finished:
+            return self.number_of_blocks * self.steps_per_block
+        return self.block_counter * self.steps_per_block + self.step_counter
+
+    def _rewind(self, block: int) -> None:
+        """Go back to the start of the given block, or of the message when that chain is not known."""
+        self.__dict__.pop('_native_start', None)  # the registers are set here, nothing to rebuild
+        if block != self.block_counter or self.finished:
+            self.block_counter = 0
+            self.h0, self.h1, self.h2, self.h3, self.h4 = compile_spec(self.spec).h
+        state = (self.h0, self.h1, self.h2, self.h3, self.h4)
+        self.A, self.B, self.C, self.D, self.E = state
+        self.Ap, self.Bp, self.Cp, self.Dp, self.Ep = state
+        self.step_counter = 0
+        self.finished = False
+
+    def trace(self) -> StepTrace:
+        """
+        Run the whole message once and record the registers of both lines after every step.
+        The hasher itself is not advanced, run_iter/run_all still start where they were.
+        :return: StepTrace with 80 rows of (A, B, C, D, E, Ap, Bp, Cp, Dp, Ep) per block
+                 and the hash values at block boundaries.
+        """
+        if self.message is None:
+            raise ValueError("Message hasn't been acknowledged.")
+
+        trace = StepTrace(self.number_of_blocks, 80, 10, 5)
+        h = compile_spec(self.spec).h
+        trace.chain[0] = h
+        for block_counter in range(self.number_of_blocks):
+            X = struct.unpack('<16I', self.message[block_counter])
+            A, B, C, D, E = h
+            Ap, Bp, Cp, Dp, Ep = h
+            rows = []
+            for j in range(80):
+                f = ROUND_FUNCTIONS[j // 16](B, C, D)
+                T = self.rotate_left((A + f + X[self.r[j]] + self.K[j // 16]) & 0xFFFFFFFF, self.s[j]) + E & 0xFFFFFFFF
+                A, E, D, C, B = E, D, self.rotate_left(C, 10), B, T
+                f_p = ROUND_FUNCTIONS[4 - j // 16](Bp, Cp, Dp)
+                T_p = self.rotate_left((Ap + f_p + X[self.rp[j]] + self.Kp[j // 16]) & 0xFFFFFFFF, self.sp[j]) + Ep & 0xFFFFFFFF
+                Ap, Ep, Dp, Cp, Bp = Ep, Dp, self.rotate_left(Cp, 10), Bp, T_p
+                rows.append((A, B, C, D, E, Ap, Bp, Cp, Dp, Ep))
+            trace.registers[block_counter * 80:(block_counter + 1) * 80] = rows
+            h0, h1, h2, h3, h4 = h
+            h = ((h1 + C + Dp) & 0xFFFFFFFF, (h2 + D + Ep) & 0xFFFFFFFF, (h3 + E + Ap) & 0xFFFFFFFF,
+                 (h4 + A + Bp) & 0xFFFFFFFF, (h0 + B + Cp) & 0xFFFFFFFF)
+            trace.chain[block_counter + 1] = h
+        return trace
 
     def get_registers(self, littleEndian: bool = True) -> str:
         """
         Get the current values of the working registers.
         :return: Hex representation of the working state A-E.
         """
+        self._require_registers()
         endianess = 'little' if littleEndian else 'big'
         digest = (self.A.to_bytes(4, endianess) +
                 self.B.to_bytes(4, endianess) +
@@ -192,7 +448,6 @@ class RIPEMD160:
                 self.E.to_bytes(4, endianess))
         return digest.hex()
 
-
     def get_h(self, littleEndian: bool = True) -> str:
         """
         Get the current values of the hash registers h1-h5.
@@ -206,6 +461,92 @@ class RIPEMD160:
                 self.h4.to_bytes(4, endianess))
         return digest.hex()
 
+    # Checkpoint layout: version, spec fingerprint, streaming chain values, total length, tail length and tail,
+    # whether the constructor message is still to be hashed by update/digest (the length is then its length),
+    # then the step-mode chain values, registers of both lines, block and step counters and the finished flag
+    # (2 when a run delegated to hashlib left the registers to be rebuilt)
+    _CHECKPOINT = struct.Struct('<B8s5IQB63sB5I10IQBB')
+
+    @classmethod
+    def from_bytes(cls, data: bytes, spec: RIPEMD160Spec = None, message=None):
+        """
+        Restore a hasher from a to_bytes() checkpoint.
+        :param data: Checkpoint bytes.
+        :param spec: Variant spec the checkpoint was made with (standard RIPEMD-160 when omitted).
+        :param message: Message to continue with in step mode. Required when the checkpoint was made before
+                        update/digest hashed the message given to the constructor, it is hashed from here then.
+        :raises ValueError: When the checkpoint doesn't match the spec or needs the message.
+        """
+        hasher = cls.from_spec(RIPEMD160Spec() if spec is None else spec)
+        hasher._restore(data, message)
+        return hasher
+
+
+def _rotl32(x, amount: int):
+    """Rotate every uint32 lane of x left by amount."""
+    amount %= 32
+    if amount == 0:
+        return x
+    return (x << amount) | (x >> (32 - amount))
+
+
+def batch_hash(messages, as_hex: bool = False, native: bool = True, **params):
+    """
+    Hash many messages at once with the same (possibly custom) RIPEMD-160 parameters,
+    e.g. HASH160 address derivation over fixed-size inputs.
+    Messages are grouped by padded block count and both lines run as uint32 operations across
+    all lanes, using the r/rp/s/sp/K/Kp tables of a RIPEMD160 built from the same parameters.
+    :param messages: Iterable of str or bytes-like messages (empty messages are allowed).
+    :param as_hex: Return a list of hexadecimal strings instead of the digest array.
+    :param native: Hand standard parameters over to hashlib (False always runs the vectorized engine).
+    :param params: Any keyword parameters of RIPEMD160 (h1, h2, h5, add_const*, order_list*, shift_list*).
+    :return: Contiguous (N, 20) uint8 digest matrix, or a list of N hexadecimal strings.
+    """
+    hasher = RIPEMD160(native=native, **params)
+    if hasher._native is not None:
+        return native_batch(hasher._native, messages, hasher.digest_size, as_hex)
+    import numpy as np
+
+    K = [np.uint32(k) for k in hasher.K]
+    Kp = [np.uint32(k) for k in hasher.Kp]
+
+    timing = instrumentation.enabled
+    if timing:
+        start = perf_counter_ns()
+    words, blocks = pack_messages(messages, 'little')
+    digests = np.empty((len(blocks), 5), dtype='<u4')
+
+    for count in np.unique(blocks):
+        lanes = np.flatnonzero(blocks == count)
+        # (blocks, 16, lanes) so that every message word is a contiguous row
+        group = np.ascontiguousarray(words[lanes, :count, :].transpose(1, 2, 0))
+        h = np.empty((5, len(lanes)), dtype=np.uint32)
+        h[0], h[1], h[2], h[3], h[4] = hasher.h0, hasher.h1, hasher.h2, hasher.h3, hasher.h4
+
+        for X in group:
+            A, B, C, D, E = h
+            Ap, Bp, Cp, Dp, Ep = h
+            for j in range(80):
+                # Left line
+                T = _rotl32(A + ROUND_FUNCTIONS[j // 16](B, C, D) + X[hasher.r[j]] + K[j // 16], hasher.s[j]) + E
+                A, E, D, C, B = E, D, _rotl32(C, 10), B, T
+                # Right line
+                T = _rotl32(Ap + ROUND_FUNCTIONS[4 - j // 16](Bp, Cp, Dp) + X[hasher.rp[j]] + Kp[j // 16], hasher.sp[j]) + Ep
+                Ap, Ep, Dp, Cp, Bp = Ep, Dp, _rotl32(Cp, 10), Bp, T
+
+            # Combine left and right results
+            h = np.stack((h[1] + C + Dp, h[2] + D + Ep, h[3] + E + Ap, h[4] + A + Bp, h[0] + B + Cp))
+
+        digests[lanes] = h.T
+
+    digests = digests.view(np.uint8)
+    if timing:
+        instrumentation.record(hasher.name, 'batch', perf_counter_ns() - start, messages=len(blocks),
+                               blocks=int(blocks.sum()))
+    if as_hex:
+        return [digest.tobytes().hex() for digest in digests]
+    return digests
+
     
 # # Example usage:
 # RIPEMD160_hash = RIPEMD160('a4567')
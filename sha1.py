@@ -1,3 +1,16 @@
+import functools
+import struct
+from time import perf_counter_ns
+from typing import Callable, NamedTuple
+
+import instrumentation
+from engine import HashEngine
+from native import native_batch, native_name
+from observers import Observers, print_registers, run_observed
+from padding import PaddedMessage, pack_messages
+from steptrace import StepTrace
+
+
 def chain_constraints(h1: str = '67452301', h2: str = 'efcdab89') -> tuple[str, str]:
     """
     Create all 4 chain constraints for MD4 hash function from 2 given numbers.
@@ -10,28 +23,108 @@ def chain_constraints(h1: str = '67452301', h2: str = 'efcdab89') -> tuple[str,
     return h3, h4
 
 
-class SHA1:
+class SHA1Spec(NamedTuple):
+    """
+    Frozen, hashable description of an SHA1 variant - the constructor parameters of SHA1.
+    Can be used as a cache key.
+    """
+    h1: str = '67452301'
+    h2: str = 'efcdab89'
+    h5: str = 'c3d2e1f0'
+    y1: str = '5a827999'
+    y2: str = '6ed9eba1'
+    y3: str = '8f1bbcdc'
+    y4: str = 'ca62c1d6'
+
+
+class CompiledSHA1(NamedTuple):
+    """Values of a compiled SHA1Spec together with its generated compression function."""
+    h: tuple[int, int, int, int, int]
+    y: tuple[int, int, int, int]
+    compress: Callable
+    native: str | None  # hashlib name when the tables are the standard ones and hashlib has the algorithm
+
+
+def _generate_compress(y) -> str:
+    """
+    Generate the source of a fully unrolled compression function.
+    The schedule is expanded into 80 local variables, the round constants are inlined as literals
+    and the registers are renamed at generation time instead of being shuffled at run time.
+    """
+    functions = ('{d} ^ ({b} & ({c} ^ {d}))',       # (b & c) | (~b & d)
+                 '{b} ^ {c} ^ {d}',
+                 '({b} & {c}) | ({d} & ({b} | {c}))',  # (b & c) | (b & d) | (c & d)
+                 '{b} ^ {c} ^ {d}')
+    words = ', '.join(f'w{i}' for i in range(16))
+    lines = ['def compress(state, block):',
+             f"    {words} = unpack('>16I', block)"]
+    for i in range(16, 80):
+        lines.append(f'    x = w{i-3} ^ w{i-8} ^ w{i-14} ^ w{i-16}')
+        lines.append(f'    w{i} = ((x << 1) | (x >> 31)) & 0xFFFFFFFF')
+    lines.append('    a, b, c, d, e = state')
+    names = ['a', 'b', 'c', 'd', 'e']
+    for i in range(80):
+        a, b, c, d, e = names
+        F = functions[i // 20].format(b=b, c=c, d=d)
+        # a is always a masked 32-bit value, so only the sum needs masking;
+        # the rotated b is only added or mixed bitwise later and is masked at the end
+        lines.append(f'    {e} = ((({a} << 5) | ({a} >> 27)) + ({F}) + {e} + {y[i // 20]:#010x} + w{i}) & 0xFFFFFFFF')
+        lines.append(f'    {b} = ({b} << 30) | ({b} >> 2)')
+        names = [e, a, b, c, d]
+    lines.append('    return ((state[0] + {}) & 0xFFFFFFFF, (state[1] + {}) & 0xFFFFFFFF, (state[2] + {}) & 0xFFFFFFFF, '
+                 '(state[3] + {}) & 0xFFFFFFFF, (state[4] + {}) & 0xFFFFFFFF)'.format(*names))
+    return '\n'.join(lines) + '\n'
+
+
+@functools.lru_cache(maxsize=256)
+def compile_spec(spec: SHA1Spec) -> CompiledSHA1:
+    """
+    Parse an SHA1Spec and generate its specialized compression function.
+    Results are kept in a bounded LRU cache, so hashers of an already seen variant are cheap to create.
+    """
+    h3, h4 = chain_constraints(spec.h1, spec.h2)
+    h = (int(spec.h1, 16), int(spec.h2, 16), int(h3, 16), int(h4, 16), int(spec.h5, 16))
+    y = (int(spec.y1, 16), int(spec.y2, 16), int(spec.y3, 16), int(spec.y4, 16))
+
+    namespace = {'unpack': struct.unpack}
+    exec(compile(_generate_compress(y), '<sha1 compress>', 'exec'), namespace)
+
+    # Standard tables (however the spec spelled them) can be handed over to hashlib
+    standard = spec == SHA1Spec() or (h, y) == compile_spec(SHA1Spec())[:2]
+    native = native_name('sha1') if standard else None
+    return CompiledSHA1(h, y, namespace['compress'], native)
+
+
+class SHA1(HashEngine):
+    name = 'sha1'
+    digest_size = 20
+    block_size = 64
+    steps_per_block = 80
+    steps_per_round = 20
+    byteorder = 'big'
+    state_size = 5
+    _chain_attrs = ('h0', 'h1', 'h2', 'h3', 'h4')
+    _registers = ('a', 'b', 'c', 'd', 'e')
+    _counters = ('current_block', 'i')
+
     def __init__(self, message: bytes = None, h1: str = '67452301', h2: str = 'efcdab89', h5: str = 'c3d2e1f0', y1: str = '5a827999',
-                 y2: str = '6ed9eba1', y3: str = '8f1bbcdc', y4: str = 'ca62c1d6'):
+                 y2: str = '6ed9eba1', y3: str = '8f1bbcdc', y4: str = 'ca62c1d6', *, native: bool = True):
         if message is None:
             self.message = None
         else:
             self.message = message
             self._prepare_message()
 
-        h3, h4 = chain_constraints(h1, h2)
+        # Variant parameters are parsed and compiled once per distinct spec
+        self.spec = SHA1Spec(h1, h2, h5, y1, y2, y3, y4)
+        compiled = compile_spec(self.spec)
 
         # Inicjalizacja rejestrów
-        self.h0 = int(h1, 16)
-        self.h1 = int(h2, 16)
-        self.h2 = int(h3, 16)
-        self.h3 = int(h4, 16)
-        self.h4 = int(h5, 16)
-
-        self.y1 = int(y1, 16)
-        self.y2 = int(y2, 16)
-        self.y3 = int(y3, 16)
-        self.y4 = int(y4, 16)
+        self.h0, self.h1, self.h2, self.h3, self.h4 = compiled.h
+        self.y1, self.y2, self.y3, self.y4 = compiled.y
+        self._compress = compiled.compress
+        # hashlib name for run_all and batch_hash, native=False keeps the Python compressor (e.g. to benchmark it)
+        self._native = compiled.native if native else None
 
         self.a = self.h0
         self.b = self.h1
@@ -41,57 +134,90 @@ class SHA1:
 
         self.current_block = 0
         self.i = 0
+        self.w = None  # message schedule of the current block
         self.finished = False
 
+        # Streaming state for update/digest: chain values, unfinished tail block and total length
+        self._stream_h = (self.h0, self.h1, self.h2, self.h3, self.h4)
+        self._tail = b''
+        self._length = 0
+        self._seed = message  # absorbed by the first update/digest call
+        self._observers = None  # see add_observer
+
+    @classmethod
+    def from_spec(cls, spec: SHA1Spec, message: bytes = None):
+        """Create a hasher for the given variant spec."""
+        return cls(message, *spec)
+
+    def ack_message(self, message: bytes):
+        self.message = message
+        self._prepare_message()
+
+    @property
+    def number_of_blocks(self) -> int:
+        return len(self.blocks)
+
+    def _padded(self):
+        return self.blocks
+
     def _prepare_message(self):
-        message = self.message.encode('utf-8')
-        original_length = len(message) * 8
-        message += b'\x80'
-        while (len(message) * 8) % 512 != 448:
-            message += b'\x00'
-        message += original_length.to_bytes(8, 'big')
-        self.blocks = [
-            message[i:i+64]
-            for i in range(0, len(message), 64)
-        ]
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
+        # Blocks are views into the message, only the padded tail is stored separately
+        self.blocks = PaddedMessage(self.message, 'big')
+        if timing:
+            instrumentation.record(self.name, 'preprocess', perf_counter_ns() - start, bytes=self.blocks.length,
+                                   padding_bytes=self.blocks.number_of_blocks * 64 - self.blocks.length)
 
     def _left_rotate(self, n, b):
         return ((n << b) | (n >> (32 - b))) & 0xFFFFFFFF
 
+    def _message_schedule(self, block: bytes) -> list[int]:
+        """Expand a 64-byte block into the 80-word message schedule."""
+        w = list(struct.unpack('>16I', block))
+        for i in range(16, 80):
+            x = w[i-3] ^ w[i-8] ^ w[i-14] ^ w[i-16]
+            w.append(((x << 1) | (x >> 31)) & 0xFFFFFFFF)
+        return w
+
     def run_iter(self):
-        if self.current_block >= len(self.blocks):
-            self.finished = True
+        if self.finished:
             return self.finished
 
-        block = self.blocks[self.current_block]
-        w = list(int.from_bytes(block[i:i+4], 'big') for i in range(0, 64, 4))
-        for i in range(16, 80):
-            w.append(self._left_rotate(w[i-3] ^ w[i-8] ^ w[i-14] ^ w[i-16], 1))
-
-
-        if self.i < 80:
-            if 0 <= self.i <= 19:
-                f = (self.b & self.c) | ((~self.b) & self.d)
-                k = self.y1
-            elif 20 <= self.i <= 39:
-                f = self.b ^ self.c ^ self.d
-                k = self.y2
-            elif 40 <= self.i <= 59:
-                f = (self.b & self.c) | (self.b & self.d) | (self.c & self.d)
-                k = self.y3
-            else:
-                f = self.b ^ self.c ^ self.d
-                k = self.y4
-
-            temp = (self._left_rotate(self.a, 5) + f + self.e + k + w[i]) & 0xFFFFFFFF
-            self.e = self.d
-            self.d = self.c
-            self.c = self._left_rotate(self.b, 30)
-            self.b = self.a
-            self.a = temp
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
+
+        # The schedule is expanded once per block and reused by all 80 steps
+        if self.w is None:
+            self.w = self._message_schedule(self.blocks[self.current_block])
+
+        if 0 <= self.i <= 19:
+            f = (self.b & self.c) | ((~self.b) & self.d)
+            k = self.y1
+        elif 20 <= self.i <= 39:
+            f = self.b ^ self.c ^ self.d
+            k = self.y2
+        elif 40 <= self.i <= 59:
+            f = (self.b & self.c) | (self.b & self.d) | (self.c & self.d)
+            k = self.y3
         else:
+            f = self.b ^ self.c ^ self.d
+            k = self.y4
+
+        temp = (self._left_rotate(self.a, 5) + f + self.e + k + self.w[self.i]) & 0xFFFFFFFF
+        self.e = self.d
+        self.d = self.c
+        self.c = self._left_rotate(self.b, 30)
+        self.b = self.a
+        self.a = temp
+
+        self.i += 1
+        if self.i == 80:
             self.current_block += 1
             self.i = 0
+            self.w = None
 
             self.h0 = (self.h0 + self.a) & 0xFFFFFFFF
             self.h1 = (self.h1 + self.b) & 0xFFFFFFFF
@@ -99,22 +225,106 @@ class SHA1:
             self.h3 = (self.h3 + self.d) & 0xFFFFFFFF
             self.h4 = (self.h4 + self.e) & 0xFFFFFFFF
 
-        self.i += 1
+            if self.current_block == len(self.blocks):
+                self.finished = True
+            else:
+                self.a = self.h0
+                self.b = self.h1
+                self.c = self.h2
+                self.d = self.h3
+                self.e = self.h4
+
+        if timing:
+            instrumentation.record(self.name, 'step', perf_counter_ns() - start, steps=1)
         return self.finished
 
+    def compress_block(self, state: tuple[int, int, int, int, int], block: bytes) -> tuple[int, int, int, int, int]:
+        """
+        Process a whole 64-byte block at once (all 80 steps).
+        Runs the compression function generated for this variant (see compile_spec).
+        :param state: Chain values (h0, h1, h2, h3, h4) before the block.
+        :param block: 64 bytes of the prepared message.
+        :return: Chain values after the block.
+        """
+        return self._compress(state, block)
+
     def run_all(self, vis: bool = False):
-        while not self.finished:
-            if vis:
-                print(self.get_registers(False))
-            self.run_iter()
+        if self.message is None:
+            raise ValueError("Message hasn't been acknowledged.")
 
+        observers = self._observers
+        if vis:
+            observers = Observers(observers)
+            observers.add(print_registers)
+        if observers:
+            run_observed(self, observers)
+        elif self._native is not None and self._step_index() == 0:
+            self._run_native()  # the working registers are None then, see rebuild_registers
+        else:
+            self._finish()
+
+        timing = instrumentation.enabled
+        if timing:
+            start = perf_counter_ns()
         digest = (self.h0.to_bytes(4, 'big') +
                   self.h1.to_bytes(4, 'big') +
                   self.h2.to_bytes(4, 'big') +
                   self.h3.to_bytes(4, 'big') +
                   self.h4.to_bytes(4, 'big'))
+        if timing:
+            instrumentation.record(self.name, 'format', perf_counter_ns() - start)
         return digest.hex()
 
+    def _step_index(self) -> int:
+        """Number of steps done so far over the whole message."""
+        if self.finished:
+            return len(self.blocks) * self.steps_per_block
+        return self.current_block * self.steps_per_block + self.i
+
+    def _rewind(self, block: int) -> None:
+        """Go back to the start of the given block, or of the message when that chain is not known."""
+        self.__dict__.pop('_native_start', None)  # the registers are set here, nothing to rebuild
+        if block != self.current_block or self.finished:
+            self.current_block = 0
+            self.h0, self.h1, self.h2, self.h3, self.h4 = compile_spec(self.spec).h
+        state = (self.h0, self.h1, self.h2, self.h3, self.h4)
+        self.a, self.b, self.c, self.d, self.e = state
+        self.i = 0
+        self.w = None
+        self.finished = False
+
+    def trace(self) -> StepTrace:
+        """
+        Run the whole message once and record the registers after every step.
+        The hasher itself is not advanced, run_iter/run_all still start where they were.
+        :return: StepTrace with 80 rows of (a, b, c, d, e) per block and the chain values at block boundaries.
+        """
+        if self.message is None:
+            raise ValueError("Message hasn't been acknowledged.")
+
+        trace = StepTrace(len(self.blocks), 80, 5, 5)
+        constants = (self.y1, self.y2, self.y3, self.y4)
+        h = compile_spec(self.spec).h
+        trace.chain[0] = h
+        for current_block in range(len(self.blocks)):
+            w = self._message_schedule(self.blocks[current_block])
+            a, b, c, d, e = h
+            rows = []
+            for i in range(80):
+                if i <= 19:
+                    f = (b & c) | ((~b) & d)
+                elif i <= 39 or i >= 60:
+                    f = b ^ c ^ d
+                else:
+                    f = (b & c) | (b & d) | (c & d)
+                temp = (self._left_rotate(a, 5) + f + e + constants[i // 20] + w[i]) & 0xFFFFFFFF
+                a, b, c, d, e = temp, a, self._left_rotate(b, 30), c, d
+                rows.append((a, b, c, d, e))
+            trace.registers[current_block * 80:(current_block + 1) * 80] = rows
+            h = tuple((x + y) & 0xFFFFFFFF for x, y in zip(h, (a, b, c, d, e)))
+            trace.chain[current_block + 1] = h
+        return trace
+
     def get_registers(self, littleEndian: bool = True) -> str:
         endianess = 'little' if littleEndian else 'big'
         digest = (self.h0.to_bytes(4, endianess) +
@@ -127,8 +337,90 @@ class SHA1:
     def get_h(self, littleEndian: bool = True) -> str:
         return self.get_registers(littleEndian)
 
+    # Checkpoint layout: version, spec fingerprint, streaming chain values, total length, tail length and tail,
+    # whether the constructor message is still to be hashed by update/digest (the length is then its length),
+    # then the step-mode chain values, registers, block and step counters and the finished flag
+    # (2 when a run delegated to hashlib left the registers to be rebuilt)
+    _CHECKPOINT = struct.Struct('<B8s5IQB63sB5I5IQBB')
+
+    def _restore(self, data: bytes, message=None) -> None:
+        super()._restore(data, message)
+        self.w = None
+
+    @classmethod
+    def from_bytes(cls, data: bytes, spec: SHA1Spec = None, message=None):
+        """
+        Restore a hasher from a to_bytes() checkpoint.
+        :param data: Checkpoint bytes.
+        :param spec: Variant spec the checkpoint was made with (standard SHA1 when omitted).
+        :param message: Message to continue with in step mode. Required when the checkpoint was made before
+                        update/digest hashed the message given to the constructor, it is hashed from here then.
+        :raises ValueError: When the checkpoint doesn't match the spec or needs the message.
+        """
+        hasher = cls.from_spec(SHA1Spec() if spec is None else spec)
+        hasher._restore(data, message)
+        return hasher
+
+
+def _rotl32(x, amount: int):
+    """Rotate every uint32 lane of x left by amount."""
+    return (x << amount) | (x >> (32 - amount))
+
+
+def batch_hash(messages, as_hex: bool = False, native: bool = True, **params):
+    """
+    Hash many messages at once with the same (possibly custom) SHA1 parameters.
+    Messages are grouped by padded block count. For every block the 80-word schedule of all lanes
+    is expanded at once into an (N, 80) uint32 array, then the four 20-step rounds run vectorized.
+    :param messages: Iterable of str or bytes-like messages (empty messages are allowed).
+    :param as_hex: Return a list of hexadecimal strings instead of the digest array.
+    :param native: Hand standard parameters over to hashlib (False always runs the vectorized engine).
+    :param params: Any keyword parameters of SHA1 (h1, h2, h5, y1..y4).
+    :return: Contiguous (N, 20) uint8 array of digests, or a list of N hexadecimal strings.
+    """
+    hasher = SHA1(native=native, **params)
+    if hasher._native is not None:
+        return native_batch(hasher._native, messages, hasher.digest_size, as_hex)
+    import numpy as np
+
+    constants = [np.uint32(hasher.y1), np.uint32(hasher.y2), np.uint32(hasher.y3), np.uint32(hasher.y4)]
+
+    timing = instrumentation.enabled
+    if timing:
+        start = perf_counter_ns()
+    words, blocks = pack_messages(messages, 'big')
+    digests = np.empty((len(blocks), 5), dtype='>u4')
+
+    for count in np.unique(blocks):
+        lanes = np.flatnonzero(blocks == count)
+        h = np.empty((5, len(lanes)), dtype=np.uint32)
+        h[0], h[1], h[2], h[3], h[4] = hasher.h0, hasher.h1, hasher.h2, hasher.h3, hasher.h4
+        # Column-major, so every schedule word w[:, i] is contiguous across lanes
+        w = np.empty((len(lanes), 80), dtype=np.uint32, order='F')
+
+        for block in range(count):
+            w[:, :16] = words[lanes, block, :]
+            for i in range(16, 80):
+                w[:, i] = _rotl32(w[:, i-3] ^ w[:, i-8] ^ w[:, i-14] ^ w[:, i-16], 1)
+
+            a, b, c, d, e = h
+            for i in range(80):
+                if i < 20:
+                    f = (b & c) | (~b & d)
+                elif i < 40 or i >= 60:
+                    f = b ^ c ^ d
+                else:
+                    f = (b & c) | (b & d) | (c & d)
+                temp = _rotl32(a, 5) + f + e + constants[i // 20] + w[:, i]
+                a, b, c, d, e = temp, a, _rotl32(b, 30), c, d
+            h = h + np.stack((a, b, c, d, e))
+
+        digests[lanes] = h.T
 
-# Example usage:
-# import hashlib
-# print(hashlib.new('sha1', 'a'.encode()).hexdigest())
-# print(SHA1('a').run_all())
\ No newline at end of file
+    digests = digests.view(np.uint8)
+    if timing:
+        instrumentation.record(hasher.name, 'batch', perf_counter_ns() - start, messages=len(blocks),
+                               blocks=int(blocks.sum()))
+    if as_hex:
+        return [digest.tobytes().hex() for digest in digests]
+    return digests
@@ -0,0 +1,49 @@
+class StepTrace:
+    """
+    Recorded run of a hasher over its whole message.
+    registers holds the working registers after every step (one row per step, blocks one after another)
+    and chain holds the chain values before the first block and after every block.
+    Any step can be read in O(1), moving back and forth does not recompute anything.
+    """
+    def __init__(self, number_of_blocks: int, steps_per_block: int, registers: int, chain_size: int):
+        import numpy as np
+
+        self.number_of_blocks = number_of_blocks
+        self.steps_per_block = steps_per_block
+        self.registers = np.empty((number_of_blocks * steps_per_block, registers), dtype=np.uint32)
+        self.chain = np.empty((number_of_blocks + 1, chain_size), dtype=np.uint32)
+
+    def __len__(self) -> int:
+        return len(self.registers)
+
+    def __getitem__(self, step):
+        return self.registers[step]
+
+    def at(self, block: int, step: int):
+        """
+        Get the working registers after the given step of the given block.
+        :param block: Block index.
+        :param step: Step index inside the block.
+        :return: Row of the registers array (uint32 values).
+        """
+        return self.registers[block * self.steps_per_block + step]
+
+    def position(self, step: int) -> tuple[int, int]:
+        """Split a global step index into (block, step inside the block)."""
+        return divmod(step, self.steps_per_block)
+
+    def hex(self, step: int, littleEndian: bool = True) -> str:
+        """
+        Format the registers after the given step like get_registers does.
+        :param step: Global step index.
+        :param littleEndian: Byte order of every register.
+        """
+        return self.registers[step].astype('<u4' if littleEndian else '>u4').tobytes().hex()
+
+    def chain_hex(self, block: int, littleEndian: bool = True) -> str:
+        """
+        Format the chain values before the given block (block == number_of_blocks gives the final ones).
+        :param block: Block boundary index.
+        :param littleEndian: Byte order of every value.
+        """
+        return self.chain[block].astype('<u4' if littleEndian else '>u4').tobytes().hex()
@@ -0,0 +1,75 @@
+import hashlib
+import struct
+
+import pytest
+
+from sha1 import SHA1
+
+TEXTS = ['a', 'abc', 'a' * 55, 'a' * 56, 'a' * 64, 'The quick brown fox jumps over the lazy dog' * 10]
+CUSTOM = dict(h1='01234567', h2='89abcdef', h5='deadbeef', y1='00000001', y2='11111111', y3='22222222', y4='33333333')
+
+
+def reference_compress(state, block, y):
+    """Plain textbook SHA1 compression with the round constants y."""
+    rotl = lambda n, b: ((n << b) | (n >> (32 - b))) & 0xFFFFFFFF
+    w = list(struct.unpack('>16I', block))
+    for i in range(16, 80):
+        w.append(rotl(w[i - 3] ^ w[i - 8] ^ w[i - 14] ^ w[i - 16], 1))
+    a, b, c, d, e = state
+    for i in range(80):
+        if i < 20:
+            f = (b & c) | (~b & d)
+        elif i < 40 or i >= 60:
+            f = b ^ c ^ d
+        else:
+            f = (b & c) | (b & d) | (c & d)
+        a, b, c, d, e = (rotl(a, 5) + f + e + y[i // 20] + w[i]) & 0xFFFFFFFF, a, rotl(b, 30), c, d
+    return tuple((x + y) & 0xFFFFFFFF for x, y in zip(state, (a, b, c, d, e)))
+
+
+def reference_hexdigest(message: bytes, h, y) -> str:
+    padded = message + b'\x80' + b'\x00' * ((55 - len(message)) % 64) + struct.pack('>Q', len(message) * 8)
+    for start in range(0, len(padded), 64):
+        h = reference_compress(h, padded[start:start + 64], y)
+    return struct.pack('>5I', *h).hex()
+
+
+def run_steps(hasher: SHA1) -> str:
+    while not hasher.run_iter():
+        pass
+    return hasher.get_h(False)
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_standard_matches_hashlib(text):
+    expected = hashlib.sha1(text.encode('utf-8')).hexdigest()
+    assert run_steps(SHA1(text)) == expected
+    assert SHA1(text).run_all() == expected
+    assert SHA1(text, native=False).run_all() == expected
+    hasher = SHA1()
+    assert reference_hexdigest(text.encode('utf-8'), hasher.get_chain(), (hasher.y1, hasher.y2, hasher.y3, hasher.y4)) == expected
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_custom_matches_reference(text):
+    hasher = SHA1(text, **CUSTOM)
+    expected = reference_hexdigest(text.encode('utf-8'), hasher.get_chain(), (hasher.y1, hasher.y2, hasher.y3, hasher.y4))
+    assert run_steps(SHA1(text, **CUSTOM)) == expected
+    assert hasher.run_all() == expected
+
+
+@pytest.mark.parametrize('params', [{}, CUSTOM], ids=['default', 'custom'])
+def test_compress_block(params):
+    hasher = SHA1(**params)
+    y = (hasher.y1, hasher.y2, hasher.y3, hasher.y4)
+    state = hasher.get_chain()
+    for block in (bytes(64), bytes(range(64)), b'\xff' * 64):
+        expected = reference_compress(state, block, y)
+        assert hasher.compress_block(state, block) == expected
+        state = expected
+
+
+@pytest.mark.parametrize('method', ['run_all', 'trace'])
+def test_without_message(method):
+    with pytest.raises(ValueError, match="hasn't been acknowledged"):
+        getattr(SHA1(), method)()
@@ -0,0 +1,185 @@
+"""
+Hashing whole directory trees on all cores.
+
+Small files are read and hashed together by the batch engines, every large file is a job of its own
+hashed through a memory mapping (see filehash.hash_file). Jobs go to a process pool largest first,
+so a huge file starts right away while the other workers keep taking the smaller jobs from the shared queue.
+"""
+import importlib
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from filehash import hash_file
+
+SMALL_FILE = 256 * 1024      # files up to this size go to the batch engines
+BATCH_FILES = 1024           # at most this many files per batch job
+BATCH_BYTES = 16 << 20       # and at most this many bytes
+
+
+def walk(root: str):
+    """
+    Find all files under root with os.scandir. Symlinked files are followed, symlinked directories are not.
+    :return: List of (relative path with / separators, size) sorted by path.
+             Unreadable directories are listed with size None.
+    """
+    files = []
+    stack = ['']
+    while stack:
+        relative = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, relative)) as entries:
+                for entry in entries:
+                    path = relative + '/' + entry.name if relative else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(path)
+                        elif entry.is_file():
+                            files.append((path, entry.stat().st_size))
+                    except OSError:
+                        files.append((path, None))
+        except OSError:
+            files.append((relative + '/', None))
+    files.sort()
+    return files
+
+
+def _stream_job(algorithm: str, params: dict, root: str, path: str):
+    try:
+        return [(path, hash_file(os.path.join(root, path), algorithm, params))]
+    except OSError:
+        return [(path, None)]
+
+
+def _batch_job(algorithm: str, params: dict, root: str, paths: list):
+    contents = []
+    readable = []
+    unreadable = []
+    for path in paths:
+        try:
+            with open(os.path.join(root, path), 'rb') as file:
+                contents.append(file.read())
+            readable.append(path)
+        except OSError:
+            unreadable.append((path, None))
+    digests = importlib.import_module(algorithm).batch_hash(contents, as_hex=True, **params) if contents else []
+    return list(zip(readable, digests)) + unreadable
+
+
+def _plan(files):
+    """
+    Split files into jobs: (kind, payload, size), largest first.
+    Small files are packed into batch jobs, large ones get a streaming job each.
+    """
+    jobs = []
+    batch, batch_bytes = [], 0
+    for path, size in files:
+        if size is None:
+            continue
+        if size > SMALL_FILE:
+            jobs.append(('stream', path, size))
+            continue
+        batch.append(path)
+        batch_bytes += size
+        if len(batch) == BATCH_FILES or batch_bytes >= BATCH_BYTES:
+            jobs.append(('batch', batch, batch_bytes))
+            batch, batch_bytes = [], 0
+    if batch:
+        jobs.append(('batch', batch, batch_bytes))
+    jobs.sort(key=lambda job: job[2], reverse=True)
+    return jobs
+
+
+def _run_jobs(algorithm: str, params: dict, root: str, files, workers: int = None):
+    """Yield (path, hexdigest or None) in completion order."""
+    for path, size in files:
+        if size is None:
+            yield path, None
+
+    jobs = _plan(files)
+    if workers == 1 or len(jobs) <= 1:
+        for kind, payload, _ in jobs:
+            job = _stream_job if kind == 'stream' else _batch_job
+            yield from job(algorithm, params, root, payload)
+        return
+
+    executor = ProcessPoolExecutor(workers)
+    completed = False
+    try:
+        pending = {executor.submit(_stream_job if kind == 'stream' else _batch_job, algorithm, params, root, payload)
+                   for kind, payload, _ in jobs}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+        completed = True
+    finally:
+        if completed:
+            executor.shutdown()
+        else:
+            # The caller stopped iterating (verify with stop_early) or a job failed. Jobs already running
+            # are not waited for - a single large file could take as long as the whole tree - the workers
+            # are stopped instead (shutdown drops the process table, so it is taken first).
+            processes = list(executor._processes.values())
+            executor.shutdown(wait=False, cancel_futures=True)
+            for process in processes:
+                process.terminate()
+
+
+def hash_tree(root: str, algorithm: str = 'md5', workers: int = None, **params):
+    """
+    Hash every file under root.
+    :param root: Directory to hash.
+    :param algorithm: md4, md5, sha1 or ripemd160.
+    :param workers: Number of worker processes (os.cpu_count() by default, 1 hashes in this process).
+    :param params: Variant parameters of the engine.
+    :return: Manifest - list of (relative path, hexdigest) sorted by path, hexdigest is None for unreadable files.
+    """
+    return sorted(_run_jobs(algorithm, params, root, walk(root), workers))
+
+
+def verify_tree(root: str, manifest, algorithm: str = 'md5', workers: int = None, stop_early: bool = False,
+                **params):
+    """
+    Check the files listed in a manifest.
+    :param manifest: List of (relative path, expected hexdigest), e.g. from read_manifest.
+    :param stop_early: Stop at the first mismatch, jobs still waiting are cancelled and running ones stopped.
+    :return: Mismatches as (relative path, expected, actual) sorted by path, actual is None for missing files.
+    """
+    expected = dict(manifest)
+    files = []
+    for path in expected:
+        try:
+            files.append((path, os.stat(os.path.join(root, path)).st_size))
+        except OSError:
+            files.append((path, None))
+
+    mismatches = []
+    results = _run_jobs(algorithm, params, root, files, workers)
+    try:
+        for path, digest in results:
+            if digest != expected[path].lower():
+                mismatches.append((path, expected[path], digest))
+                if stop_early:
+                    break
+    finally:
+        results.close()
+    return sorted(mismatches)
+
+
+def write_manifest(manifest, file) -> None:
+    """Write a manifest as sha1sum-style lines ("<hexdigest>  <path>"), unreadable files are skipped."""
+    for path, digest in manifest:
+        if digest is not None:
+            file.write(f"{digest}  {path}\n")
+
+
+def read_manifest(file):
+    """Read sha1sum-style lines back into a list of (path, hexdigest)."""
+    manifest = []
+    for line in file:
+        line = line.rstrip('\n')
+        if line:
+            # "<digest>  <path>" for text mode, "<digest> *<path>" for binary mode
+            digest, _, path = line.partition(' ')
+            manifest.append((path[1:], digest))
+    return manifest